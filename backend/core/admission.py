@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+import os
+import threading
+
+
+# name -> (default concurrency, default queue depth)
+_STAGE_DEFAULTS: Dict[str, tuple[int, int]] = {
+    "parse": (4, 16),
+    "embed": (2, 8),
+    "llm": (2, 4),
+}
+
+
+class StageSaturatedError(RuntimeError):
+    """Raised when a stage has no free slot and its wait queue is full."""
+
+    def __init__(self, stage: str, retry_after: int) -> None:
+        super().__init__(f"The {stage} stage is overloaded. Please retry shortly.")
+        self.stage = stage
+        self.retry_after = retry_after
+
+
+class Stage:
+    """Concurrency limit plus a bounded wait queue for one pipeline stage."""
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        queue_depth: int,
+        wait_seconds: float = 30.0,
+        retry_after: int = 5,
+    ) -> None:
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_depth = max(0, queue_depth)
+        self.wait_seconds = wait_seconds
+        self.retry_after = retry_after
+        self._active = 0
+        self._waiting = 0
+        self._rejected = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, wait: bool = True) -> None:
+        # Inside blocking() a waiting caller queues past the depth limit and never times out
+        block = wait and getattr(_local, "blocking", False)
+        with self._cond:
+            if self._active < self.concurrency:
+                self._active += 1
+                return
+            if not wait or (self._waiting >= self.queue_depth and not block):
+                self._rejected += 1
+                raise StageSaturatedError(self.name, self.retry_after)
+            self._waiting += 1
+            try:
+                admitted = self._cond.wait_for(
+                    lambda: self._active < self.concurrency,
+                    timeout=None if block else self.wait_seconds,
+                )
+            finally:
+                self._waiting -= 1
+            if not admitted:
+                self._rejected += 1
+                raise StageSaturatedError(self.name, self.retry_after)
+            self._active += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "active": self._active,
+                "waiting": self._waiting,
+                "rejected": self._rejected,
+                "concurrency": self.concurrency,
+                "queue_depth": self.queue_depth,
+            }
+
+
+_stages: Dict[str, Stage] = {}
+_stages_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_stage(name: str) -> Stage:
+    with _stages_lock:
+        stage = _stages.get(name)
+        if stage is None:
+            concurrency, depth = _STAGE_DEFAULTS.get(name, (2, 8))
+            prefix = f"ADMISSION_{name.upper()}"
+            stage = Stage(
+                name,
+                concurrency=int(os.environ.get(f"{prefix}_CONCURRENCY", str(concurrency))),
+                queue_depth=int(os.environ.get(f"{prefix}_QUEUE", str(depth))),
+                wait_seconds=float(os.environ.get("ADMISSION_WAIT_SECONDS", "30")),
+                retry_after=int(os.environ.get("ADMISSION_RETRY_AFTER", "5")),
+            )
+            _stages[name] = stage
+        return stage
+
+
+@contextmanager
+def admit(name: str, wait: bool = True) -> Iterator[None]:
+    """Hold a slot of stage `name` for the duration of the block.
+
+    Raises StageSaturatedError instead of piling up work when the stage is
+    at its concurrency limit and its wait queue is full (or wait=False).
+    """
+    stage = get_stage(name)
+    stage.acquire(wait=wait)
+    try:
+        yield
+    finally:
+        stage.release()
+
+
+@contextmanager
+def blocking() -> Iterator[None]:
+    """Make admit() in this thread wait for a slot instead of raising StageSaturatedError.
+
+    For background task workers: their number is already bounded, and a task
+    failing because a stage was briefly busy would have to be resubmitted by
+    hand. admit(wait=False) still raises, so degrade paths keep working.
+    """
+    previous = getattr(_local, "blocking", False)
+    _local.blocking = True
+    try:
+        yield
+    finally:
+        _local.blocking = previous
+
+
+def llm_degrade_enabled() -> bool:
+    """When set, a saturated LLM stage falls back to template output instead of queueing."""
+    return os.environ.get("LLM_DEGRADE_ON_OVERLOAD", "").lower() in ("1", "true", "yes")
+
+
+def stats(names: Optional[list[str]] = None) -> Dict[str, Dict[str, int]]:
+    return {name: get_stage(name).stats() for name in (names or list(_STAGE_DEFAULTS))}
@@ -0,0 +1,509 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import copy
+import gzip
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+import orjson
+
+try:
+    import brotli  # type: ignore
+except Exception:  # optional: only used when installed
+    brotli = None
+
+try:
+    import fcntl  # type: ignore
+except Exception:  # non-POSIX: fall back to in-process locking only
+    fcntl = None
+
+
+from .admission import StageSaturatedError
+
+
+# Seed only: read while no manifest exists, or on an explicit import_jobs_file()/replace_all()
+_JOBS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "jobs.json")
+_STORE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "vector_store"))
+# The manifest is the single source of truth once it exists: it names the
+# vector files and carries the role snapshot and stable ids, so replacing it
+# swaps catalog and index together. Runtime edits never touch jobs.json.
+_MANIFEST_PATH = os.path.join(_STORE_DIR, "catalog.json")
+_LOCK_PATH = os.path.join(_STORE_DIR, ".catalog.lock")
+_LEGACY_KEYS_PATH = os.path.join(_STORE_DIR, "role_keys.json")
+_LEGACY_VECTORS_PATH = os.path.join(_STORE_DIR, "role_vectors.npy")
+
+
+def role_text(category: str, role: str, meta: Dict[str, Any]) -> str:
+    """Text embedded for a role; must match scripts/build_faiss.py."""
+    desc = meta.get("description") or role
+    return f"{category}::{role} — {desc}"
+
+
+def _flatten(roles: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+    return {f"{cat}::{role}": role_text(cat, role, meta) for cat, rs in roles.items() for role, meta in rs.items()}
+
+
+def _read_jobs_file() -> Tuple[Dict[str, Any], str]:
+    if not os.path.exists(_JOBS_PATH):
+        return {}, ""
+    with open(_JOBS_PATH, "rb") as f:
+        raw = f.read()
+    return json.loads(raw.decode("utf-8")), hashlib.sha1(raw).hexdigest()
+
+
+def _stat(path: str) -> Tuple[float, int]:
+    try:
+        st = os.stat(path)
+        return st.st_mtime, st.st_size
+    except OSError:
+        return 0.0, 0
+
+
+class RoleCatalog:
+    """One immutable version of the role catalog and its ID-mapped vectors.
+
+    Row r of `matrix` belongs to stable id `vector_ids[r]`. An update appends
+    a new row for the id and leaves the old one dead until compaction, so
+    existing ids never move and no other role is re-encoded.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        roles: Dict[str, Dict[str, Any]],
+        ids: Dict[str, int],
+        next_id: int,
+        matrix: Optional[np.ndarray] = None,
+        vector_ids: Optional[np.ndarray] = None,
+        jobs_sha: str = "",
+    ) -> None:
+        self.version = version
+        self.roles = roles
+        self.ids = ids
+        self.next_id = next_id
+        self.matrix = matrix
+        self.vector_ids = vector_ids if vector_ids is not None else np.zeros(0, dtype=np.int64)
+        # Only set for the unmanaged catalog read straight from jobs.json (version 0)
+        self.jobs_sha = jobs_sha
+        key_of_id = {i: k for k, i in ids.items()}
+        # Last row written for an id is the live one
+        self.row_of_id: Dict[int, int] = {}
+        for row, i in enumerate(self.vector_ids.tolist()):
+            if i in key_of_id:
+                self.row_of_id[i] = row
+        self.row_keys: List[str] = [""] * len(self.vector_ids)
+        for i, row in self.row_of_id.items():
+            self.row_keys[row] = key_of_id[i]
+
+    @property
+    def has_vectors(self) -> bool:
+        return self.matrix is not None and self.matrix.shape[0] > 0
+
+    @property
+    def dead_rows(self) -> int:
+        return len(self.vector_ids) - len(self.row_of_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "categories": len(self.roles),
+            "roles": len(self.ids),
+            "rows": int(len(self.vector_ids)),
+            "dead_rows": self.dead_rows,
+            "next_id": self.next_id,
+        }
+
+
+_catalog: Optional[RoleCatalog] = None
+_catalog_stamp: Optional[Tuple[Tuple[float, int], Tuple[float, int]]] = None
+_catalog_lock = threading.Lock()  # guards the cached catalog; held only briefly
+_write_lock = threading.Lock()  # serializes writers within this process
+_vectors_failed = False
+_background: Optional[threading.Thread] = None
+
+
+class _FileLock:
+    """Serializes catalog writers across worker processes."""
+
+    def __enter__(self) -> "_FileLock":
+        os.makedirs(_STORE_DIR, exist_ok=True)
+        self._fh = open(_LOCK_PATH, "a+")
+        if fcntl is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        self._fh.close()
+
+
+def _load_manifest() -> Optional[RoleCatalog]:
+    if not os.path.exists(_MANIFEST_PATH):
+        return None
+    try:
+        with open(_MANIFEST_PATH, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        matrix = np.load(os.path.join(_STORE_DIR, manifest["vectors"]), mmap_mode="r")
+        vector_ids = np.load(os.path.join(_STORE_DIR, manifest["vector_ids"]), mmap_mode="r")
+    except Exception as ex:
+        print(f"DEBUG: could not load catalog manifest: {ex}")
+        return None
+    return RoleCatalog(
+        version=int(manifest["version"]),
+        roles=manifest["roles"],
+        ids={k: int(v) for k, v in manifest["ids"].items()},
+        next_id=int(manifest["next_id"]),
+        matrix=matrix,
+        vector_ids=np.asarray(vector_ids, dtype=np.int64),
+    )
+
+
+def _unmanaged_catalog() -> RoleCatalog:
+    """Catalog straight from jobs.json before any vectors have been committed."""
+    roles, sha = _read_jobs_file()
+    keys = list(_flatten(roles))
+    return RoleCatalog(0, roles, {k: i for i, k in enumerate(keys)}, len(keys), jobs_sha=sha)
+
+
+def _write_version(cat: RoleCatalog) -> None:
+    """Persist `cat`: vector files first, then the manifest swap that commits it."""
+    os.makedirs(_STORE_DIR, exist_ok=True)
+    vectors_name = f"role_vectors.v{cat.version}.npy"
+    ids_name = f"role_ids.v{cat.version}.npy"
+    matrix = cat.matrix if cat.matrix is not None else np.zeros((0, 384), dtype=np.float32)
+    for name, arr in ((vectors_name, np.ascontiguousarray(matrix, dtype=np.float32)),
+                      (ids_name, np.ascontiguousarray(cat.vector_ids, dtype=np.int64))):
+        tmp = os.path.join(_STORE_DIR, f"{name}.{os.getpid()}.tmp.npy")
+        np.save(tmp, arr)
+        os.replace(tmp, os.path.join(_STORE_DIR, name))
+
+    manifest = {
+        "version": cat.version,
+        "next_id": cat.next_id,
+        "ids": cat.ids,
+        "vectors": vectors_name,
+        "vector_ids": ids_name,
+        "roles": cat.roles,
+    }
+    tmp_manifest = f"{_MANIFEST_PATH}.{os.getpid()}.tmp"
+    with open(tmp_manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_manifest, _MANIFEST_PATH)
+
+    # Keep the previous version for workers that have not remapped yet
+    keep = {vectors_name, ids_name, f"role_vectors.v{cat.version - 1}.npy", f"role_ids.v{cat.version - 1}.npy"}
+    for name in os.listdir(_STORE_DIR):
+        if (name.startswith("role_vectors.v") or name.startswith("role_ids.v")) and name.endswith(".npy") and name not in keep:
+            try:
+                os.remove(os.path.join(_STORE_DIR, name))
+            except OSError:
+                pass
+
+
+def _embed_roles(texts: List[str]) -> np.ndarray:
+    from .embeddings import embed_texts, normalize_rows
+
+    return normalize_rows(embed_texts(texts))
+
+
+def _legacy_vectors(keys: List[str]) -> Dict[str, np.ndarray]:
+    """Rows from build_faiss.py output that can be reused instead of re-encoded."""
+    if not (os.path.exists(_LEGACY_KEYS_PATH) and os.path.exists(_LEGACY_VECTORS_PATH)):
+        return {}
+    try:
+        with open(_LEGACY_KEYS_PATH, "r", encoding="utf-8") as f:
+            legacy_keys = json.load(f)
+        matrix = np.load(_LEGACY_VECTORS_PATH, mmap_mode="r")
+    except Exception:
+        return {}
+    if matrix.ndim != 2 or matrix.shape[0] != len(legacy_keys):
+        return {}
+    wanted = set(keys)
+    return {k: np.asarray(matrix[i]) for i, k in enumerate(legacy_keys) if k in wanted}
+
+
+def _commit(
+    base: RoleCatalog,
+    roles: Dict[str, Dict[str, Any]],
+    reuse: Optional[Dict[str, np.ndarray]] = None,
+) -> RoleCatalog:
+    """Write a new version for `roles`, encoding only roles whose embedded text changed."""
+    old_texts = _flatten(base.roles) if base.has_vectors else {}
+    new_texts = _flatten(roles)
+
+    ids = {k: i for k, i in base.ids.items() if k in new_texts}
+    next_id = base.next_id
+    for k in new_texts:
+        if k not in ids:
+            ids[k] = next_id
+            next_id += 1
+
+    changed = [k for k, t in new_texts.items() if old_texts.get(k) != t or base.ids.get(k) not in base.row_of_id]
+    fresh: Dict[str, np.ndarray] = {}
+    if reuse:
+        fresh.update({k: reuse[k] for k in changed if k in reuse})
+    to_encode = [k for k in changed if k not in fresh]
+    if to_encode:
+        vecs = _embed_roles([new_texts[k] for k in to_encode])
+        fresh.update(zip(to_encode, vecs))
+
+    if base.has_vectors:
+        matrix = np.asarray(base.matrix)
+        vector_ids = np.asarray(base.vector_ids)
+    else:
+        matrix = np.zeros((0, 0), dtype=np.float32)
+        vector_ids = np.zeros(0, dtype=np.int64)
+    if fresh:
+        new_rows = np.stack([fresh[k] for k in fresh]).astype(np.float32, copy=False)
+        matrix = new_rows if matrix.shape[0] == 0 else np.vstack([matrix, new_rows])
+        vector_ids = np.concatenate([vector_ids, np.asarray([ids[k] for k in fresh], dtype=np.int64)])
+
+    cat = RoleCatalog(base.version + 1, roles, ids, next_id, matrix, vector_ids)
+    _write_version(cat)
+    return cat
+
+
+def _compacted(base: RoleCatalog) -> RoleCatalog:
+    rows = sorted(base.row_of_id.values())
+    matrix = np.asarray(base.matrix)[rows] if base.has_vectors else None
+    vector_ids = np.asarray(base.vector_ids)[rows]
+    cat = RoleCatalog(base.version + 1, base.roles, base.ids, base.next_id, matrix, vector_ids)
+    _write_version(cat)
+    return cat
+
+
+def _current_stamp() -> Tuple[Tuple[float, int], Tuple[float, int]]:
+    manifest = _stat(_MANIFEST_PATH)
+    # jobs.json only matters until the first version is committed
+    return manifest, (_stat(_JOBS_PATH) if manifest == (0.0, 0) else (0.0, 0))
+
+
+def _refresh_locked(force: bool = False) -> RoleCatalog:
+    global _catalog, _catalog_stamp
+    stamp = _current_stamp()
+    if not force and _catalog is not None and stamp == _catalog_stamp:
+        return _catalog
+    cat = _load_manifest()
+    if cat is None:
+        cat = _unmanaged_catalog()
+    _catalog, _catalog_stamp = cat, stamp
+    return cat
+
+
+def get_catalog() -> RoleCatalog:
+    with _catalog_lock:
+        return _refresh_locked()
+
+
+def catalog_version() -> str:
+    """Cheap token that changes whenever roles or vectors change."""
+    cat = get_catalog()
+    # Before the first commit, hand edits of jobs.json are the only way roles change
+    return f"v{cat.version}:{cat.jobs_sha}" if cat.jobs_sha else f"v{cat.version}"
+
+
+def current_roles() -> Dict[str, Dict[str, Any]]:
+    return get_catalog().roles
+
+
+def _mutate(fn: Callable[[RoleCatalog], Optional[RoleCatalog]]) -> RoleCatalog:
+    global _catalog, _catalog_stamp
+    with _write_lock, _FileLock():
+        # Always start from what is on disk; another worker may have committed
+        with _catalog_lock:
+            base = _refresh_locked(force=True)
+        # Encoding happens here, outside _catalog_lock, so readers keep the old version meanwhile
+        result = fn(base)
+        if result is None:
+            return base
+        with _catalog_lock:
+            _catalog = result
+            _catalog_stamp = _current_stamp()
+    _maybe_compact(result)
+    return result
+
+
+def _schedule(job: Callable[[], Any]) -> None:
+    """Run one catalog maintenance job at a time in the background."""
+    global _background
+    if _background is not None and _background.is_alive():
+        return
+
+    def run() -> None:
+        try:
+            job()
+        except Exception as ex:
+            print(f"DEBUG: catalog background job failed: {ex}")
+
+    _background = threading.Thread(target=run, name="catalog-maintenance", daemon=True)
+    _background.start()
+
+
+def _maybe_compact(cat: RoleCatalog) -> None:
+    threshold = max(16, int(len(cat.vector_ids) * float(os.environ.get("CATALOG_COMPACT_RATIO", "0.25"))))
+    if cat.dead_rows > threshold:
+        _schedule(compact)
+
+
+def schedule_compaction() -> None:
+    _schedule(compact)
+
+
+def compact() -> RoleCatalog:
+    """Drop dead rows left behind by updates and removals (no re-encoding)."""
+    return _mutate(lambda base: _compacted(base) if base.dead_rows else None)
+
+
+def ensure_vectors() -> RoleCatalog:
+    """Catalog with vectors, committing the first version from jobs.json if needed.
+
+    Rows from a previous scripts/build_faiss.py run are reused; only roles
+    missing from it are encoded. If the encoder is unavailable the catalog is
+    returned without vectors and callers fall back to the FAISS index. A
+    saturated embed stage is transient: it propagates (503 + Retry-After) and
+    the build is retried on a later call.
+    """
+    global _vectors_failed
+    cat = get_catalog()
+    if cat.has_vectors or _vectors_failed or not cat.ids:
+        return cat
+
+    def build(base: RoleCatalog) -> Optional[RoleCatalog]:
+        if base.has_vectors:
+            return None
+        return _commit(base, base.roles, reuse=_legacy_vectors(list(_flatten(base.roles))))
+
+    try:
+        return _mutate(build)
+    except StageSaturatedError:
+        raise
+    except Exception as ex:
+        print(f"DEBUG: could not build role vectors: {ex}")
+        _vectors_failed = True
+        return get_catalog()
+
+
+def replace_all(roles: Dict[str, Dict[str, Any]], keys: List[str], vectors: np.ndarray) -> RoleCatalog:
+    """Commit a full rebuild (e.g. from build_faiss.py), keeping ids of existing roles.
+
+    This replaces the catalog with `roles`, so runtime edits not present in
+    them are dropped.
+    """
+    reuse = {k: vectors[i] for i, k in enumerate(keys)}
+
+    def rebuild(base: RoleCatalog) -> RoleCatalog:
+        # Forget old vectors so every role takes its row from the rebuild
+        stripped = RoleCatalog(base.version, base.roles, base.ids, base.next_id)
+        return _commit(stripped, roles, reuse=reuse)
+
+    return _mutate(rebuild)
+
+
+def import_jobs_file() -> RoleCatalog:
+    """Replace the catalog with the current jobs.json, encoding only roles that changed.
+
+    The explicit way to apply hand edits of jobs.json once a manifest exists;
+    runtime edits not present in the file are dropped.
+    """
+    def apply(base: RoleCatalog) -> Optional[RoleCatalog]:
+        roles, sha = _read_jobs_file()
+        if not sha:
+            raise CatalogError("jobs.json not found")
+        if roles == base.roles and base.has_vectors:
+            return None
+        return _commit(base, roles)
+
+    return _mutate(apply)
+
+
+class CatalogError(ValueError):
+    """Invalid catalog edit (unknown category/role or conflicting name)."""
+
+
+def upsert_role(category: str, role: str, meta: Dict[str, Any], create_category: bool = True) -> RoleCatalog:
+    if not category.strip() or not role.strip() or "::" in category or "::" in role:
+        raise CatalogError("category and role must be non-empty and must not contain '::'")
+
+    def apply(base: RoleCatalog) -> RoleCatalog:
+        if category not in base.roles and not create_category:
+            raise CatalogError(f"Unknown category '{category}'")
+        roles = copy.deepcopy(base.roles)
+        roles.setdefault(category, {})[role] = meta
+        return _commit(base, roles)
+
+    return _mutate(apply)
+
+
+def remove_role(category: str, role: str) -> RoleCatalog:
+    def apply(base: RoleCatalog) -> RoleCatalog:
+        if role not in base.roles.get(category, {}):
+            raise CatalogError(f"Unknown role '{category}::{role}'")
+        roles = copy.deepcopy(base.roles)
+        del roles[category][role]
+        return _commit(base, roles)
+
+    return _mutate(apply)
+
+
+def add_category(category: str) -> RoleCatalog:
+    if not category.strip() or "::" in category:
+        raise CatalogError("category must be non-empty and must not contain '::'")
+
+    def apply(base: RoleCatalog) -> Optional[RoleCatalog]:
+        if category in base.roles:
+            return None
+        roles = copy.deepcopy(base.roles)
+        roles[category] = {}
+        return _commit(base, roles)
+
+    return _mutate(apply)
+
+
+def remove_category(category: str) -> RoleCatalog:
+    def apply(base: RoleCatalog) -> RoleCatalog:
+        if category not in base.roles:
+            raise CatalogError(f"Unknown category '{category}'")
+        roles = copy.deepcopy(base.roles)
+        del roles[category]
+        return _commit(base, roles)
+
+    return _mutate(apply)
+
+
+class CatalogPayload:
+    """The role catalog serialized and compressed once per catalog version."""
+
+    def __init__(self, raw: bytes) -> None:
+        self.raw = raw
+        self.etag = f'"{hashlib.sha1(raw).hexdigest()[:20]}"'
+        self.encoded: Dict[str, bytes] = {"gzip": gzip.compress(raw, compresslevel=9)}
+        if brotli is not None:
+            self.encoded["br"] = brotli.compress(raw, quality=11)
+
+    def best_encoding(self, accept_encoding: str) -> Optional[str]:
+        accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+        for name in ("br", "gzip"):
+            if name in self.encoded and name in accepted:
+                return name
+        return None
+
+
+_payload: Optional[CatalogPayload] = None
+_payload_version: Optional[str] = None
+_payload_lock = threading.Lock()
+
+
+def get_catalog_payload() -> CatalogPayload:
+    global _payload, _payload_version
+    version = catalog_version()
+    if _payload is not None and _payload_version == version:
+        return _payload
+    with _payload_lock:
+        if _payload is None or _payload_version != version:
+            _payload = CatalogPayload(orjson.dumps(current_roles()))
+            _payload_version = version
+        return _payload
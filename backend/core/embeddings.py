@@ -1,10 +1,15 @@
 from __future__ import annotations
 
-from typing import List, Tuple, Dict, Any, Optional
+from typing import Iterator, List, Tuple, Dict, Any, Optional
+import hashlib
 import os
-import json
+import re
+import threading
 import numpy as np
 
+from .admission import admit
+from .parser import normalize_whitespace
+
 _model = None
 
 
@@ -17,64 +22,207 @@ def _load_model():
 
 
 def load_roles_data() -> Dict[str, Any]:
-    data_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "jobs.json")
-    if not os.path.exists(data_path):
-        return {}
-    with open(data_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    # The catalog manifest owns the roles (jobs.json is only its seed); imported lazily to avoid a cycle
+    from .catalog import current_roles
+
+    return current_roles()
 
 
 def embed_texts(texts: List[str]) -> np.ndarray:
     model = _load_model()
-    vectors = model.encode(texts, convert_to_numpy=True, normalize_embeddings=False)
-    vectors = vectors.astype(np.float32)
-    return vectors
+    with admit("embed"):
+        vectors = model.encode(texts, convert_to_numpy=True, normalize_embeddings=False)
+    # No-op when the encoder already returns float32
+    return np.asarray(vectors, dtype=np.float32)
 
 
-def _mean_pool(vectors: np.ndarray) -> np.ndarray:
-    if vectors.ndim == 1:
-        return vectors
-    return vectors.mean(axis=0)
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows in place (vectors must be a writable float32 array)."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms += 1e-12
+    vectors /= norms
+    return vectors
 
 
-def embed_resume_text(text: str) -> Tuple[np.ndarray, str]:
-    # naive chunking by sentences/periods for MVP
-    sentences = [s.strip() for s in text.split(".") if s.strip()]
+_sentence_re = re.compile(r"[^.]+")
 
-    chunks: List[str] = []
+
+def _iter_chunks(text: str, max_tokens: int = 250) -> Iterator[str]:
+    """Yield ~max_tokens-word chunks of period-separated sentences without splitting the whole text up front."""
     buf: List[str] = []
     token_estimate = 0
-    for s in sentences:
-        token_estimate += max(1, len(s.split()) // 1)
+    for m in _sentence_re.finditer(text):
+        s = m.group(0).strip()
+        if not s:
+            continue
+        token_estimate += max(1, len(s.split()))
         buf.append(s)
-        if token_estimate >= 250:
-            chunks.append(". ".join(buf))
+        if token_estimate >= max_tokens:
+            yield ". ".join(buf)
             buf = []
             token_estimate = 0
     if buf:
-        chunks.append(". ".join(buf))
-    if not chunks:
-        chunks = [text]
-    vecs = embed_texts(chunks)
-    pooled = _mean_pool(vecs)
+        yield ". ".join(buf)
+
+
+def _chunk_text(text: str) -> List[str]:
+    # naive chunking by sentences/periods for MVP
+    return list(_iter_chunks(text)) or [text]
+
+
+def resume_chunks(
+    text: str,
+    sections: Optional[List[Tuple[str, float]]] = None,
+) -> Tuple[List[str], List[float]]:
+    """Chunks to embed and their pooling weights.
+
+    With `sections` ((text, weight) pairs from sections.select_sections) only
+    those sections are chunked, each chunk weighted by its section's weight.
+    """
+    if not sections:
+        whole = _chunk_text(text)
+        return whole, [1.0] * len(whole)
+    chunks: List[str] = []
+    weights: List[float] = []
+    for section_text, weight in sections:
+        for chunk in _chunk_text(normalize_whitespace(section_text)):
+            chunks.append(chunk)
+            weights.append(weight)
+    return chunks, weights
+
+
+def embed_chunks(
+    chunks: List[str],
+    weights: List[float],
+    known: Optional[Dict[str, np.ndarray]] = None,
+) -> Tuple[np.ndarray, Dict[str, np.ndarray], int]:
+    """Weighted-pooled, normalized vector over chunks.
+
+    Chunk vectors found in `known` (keyed by text_key) are reused, so a
+    revised resume only encodes the chunks that changed. Returns (pooled,
+    chunk vectors by key, number of chunks encoded).
+    """
+    known = known or {}
+    keys = [text_key(c) for c in chunks]
+    fresh = list(dict.fromkeys(c for c, k in zip(chunks, keys) if k not in known))
+    vectors: Dict[str, np.ndarray] = {}
+    if fresh:
+        vectors.update(zip((text_key(c) for c in fresh), embed_texts(fresh)))
+    vectors.update((k, known[k]) for k in keys if k in known)
+    # Cached chunk vectors are float16; stacking into float32 upcasts them
+    vecs = np.stack([vectors[k] for k in keys]).astype(np.float32, copy=False)
+    w = np.asarray(weights, dtype=np.float32)
+    # Weighted sum as one mat-vec instead of materializing vecs * w
+    pooled = w @ vecs
+    pooled /= w.sum() + 1e-12
     # L2 normalize for cosine via dot
-    norm = np.linalg.norm(pooled) + 1e-12
-    pooled = (pooled / norm).astype(np.float32)
-    preview = " ".join(text.split()[:300])
-    return pooled, preview
+    return normalize_rows(pooled), vectors, len(fresh)
+
 
+def resume_preview(text: str) -> str:
+    return " ".join(text.split()[:300])
 
-_CACHE: Dict[str, Tuple[np.ndarray, str]] = {}
 
+_CACHE: Dict[str, Dict[str, Any]] = {}
+_CACHE_SIZES: Dict[str, int] = {}
+_CACHE_MAX_BYTES = int(os.environ.get("RESUME_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+_cache_lock = threading.Lock()
+_cache_bytes = 0
 
-def cache_resume_vector(vec: np.ndarray, preview: str) -> str:
-    resume_id = f"r_{abs(hash(preview)) % (10**8):08d}"
-    _CACHE[resume_id] = (vec, preview)
+
+def _compact_vectors(vectors: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    if not vectors:
+        return {}
+    # One float16 block instead of an array (and header) per chunk
+    block = np.stack(list(vectors.values())).astype(np.float16)
+    return dict(zip(vectors.keys(), block))
+
+
+def _record_bytes(record: Dict[str, Any]) -> int:
+    # Dominant payloads only: texts (about a byte per char) and vector buffers
+    size = len(record.get("text") or "") + len(record.get("preview") or "")
+    size += record["vector"].nbytes
+    size += sum(v.nbytes for v in (record.get("chunk_vectors") or {}).values())
+    size += sum(len(k) + sum(len(s) for s in v) for k, v in (record.get("section_skills") or {}).items())
+    return size
+
+
+def cache_resume_vector(
+    vec: np.ndarray,
+    preview: str,
+    skills: Optional[List[str]] = None,
+    text: Optional[str] = None,
+    content_sha: Optional[str] = None,
+    **revision: Any,
+) -> str:
+    """Cache a resume; `revision` holds the state a later re-upload is diffed against.
+
+    The id is derived from `content_sha` (the hash of the uploaded bytes), so
+    it is stable across processes and every revision gets its own entry.
+    Vectors are stored as float16 (half the memory, well within cosine
+    precision needs) and upcast to float32 on load.
+    """
+    global _cache_bytes
+    if content_sha is None:
+        content_sha = hashlib.sha1((text if text is not None else preview).encode("utf-8")).hexdigest()
+    resume_id = f"r_{content_sha[:16]}"
+    if "chunk_vectors" in revision:
+        revision["chunk_vectors"] = _compact_vectors(revision["chunk_vectors"])
+    record = {
+        "vector": vec.astype(np.float16),
+        "preview": preview,
+        "skills": skills,
+        "text": text,
+        "content_sha": content_sha,
+        **revision,
+    }
+    size = _record_bytes(record)
+    with _cache_lock:
+        _cache_bytes -= _CACHE_SIZES.pop(resume_id, 0)
+        _CACHE.pop(resume_id, None)
+        _CACHE[resume_id] = record
+        _CACHE_SIZES[resume_id] = size
+        _cache_bytes += size
+        # Oldest resumes go first once the cache is over its byte budget; the newest always stays
+        while _cache_bytes > _CACHE_MAX_BYTES and len(_CACHE) > 1:
+            oldest = next(iter(_CACHE))
+            del _CACHE[oldest]
+            _cache_bytes -= _CACHE_SIZES.pop(oldest)
     return resume_id
 
 
-def load_cached_resume_vector(resume_id: str) -> Tuple[Optional[np.ndarray], Optional[str]]:
-    pair = _CACHE.get(resume_id)
-    if not pair:
-        return None, None
-    return pair
+def load_cached_resume(resume_id: str) -> Optional[Dict[str, Any]]:
+    record = _CACHE.get(resume_id)
+    if record is None:
+        return None
+    return {**record, "vector": record["vector"].astype(np.float32)}
+
+
+# Normalized target (role description / JD) vectors keyed by a hash of the text,
+# so an edited description is re-embedded while unchanged ones never are.
+_TARGET_CACHE: Dict[str, np.ndarray] = {}
+_TARGET_CACHE_MAX = 2048
+_target_lock = threading.Lock()
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def embed_targets(texts: List[str]) -> np.ndarray:
+    """L2-normalized vectors for target texts; only uncached texts are encoded, in one batch."""
+    keys = [text_key(t) for t in texts]
+    with _target_lock:
+        found = [_TARGET_CACHE.get(k) for k in keys]
+    fresh: Dict[str, np.ndarray] = {}
+    missing = list(dict.fromkeys(t for t, f in zip(texts, found) if f is None))
+    if missing:
+        vecs = normalize_rows(embed_texts(missing))
+        fresh = {text_key(t): v for t, v in zip(missing, vecs)}
+        with _target_lock:
+            if len(_TARGET_CACHE) + len(fresh) > _TARGET_CACHE_MAX:
+                _TARGET_CACHE.clear()
+            _TARGET_CACHE.update(fresh)
+    if not keys:
+        return np.zeros((0, 384), dtype=np.float32)
+    return np.stack([f if f is not None else fresh[k] for f, k in zip(found, keys)])
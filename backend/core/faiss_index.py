@@ -5,9 +5,13 @@ import os
 import json
 import numpy as np
 
+from .catalog import ensure_vectors
+
 _faiss_index = None
 _role_keys: List[str] = []
 
+_STORE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "vector_store"))
+
 
 def _load_faiss():
     global _faiss_index
@@ -17,18 +21,20 @@ def _load_faiss():
         import faiss  # type: ignore
     except Exception as ex:
         raise RuntimeError("FAISS not installed. Add faiss-cpu to requirements.") from ex
-    base = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "vector_store")
-    base = os.path.abspath(base)
-    idx_path = os.path.join(base, "role_index.faiss")
+    idx_path = os.path.join(_STORE_DIR, "role_index.faiss")
     # Create empty flat index for 384-dim as default if file missing or empty
     if not os.path.exists(idx_path) or os.path.getsize(idx_path) == 0:
         _faiss_index = faiss.IndexFlatIP(384)
         return _faiss_index
-    # Try reading index; if it fails, fall back to empty index
+    # Map the index file instead of copying it into every worker; not all
+    # index types support mmap, so fall back to a regular read.
     try:
-        _faiss_index = faiss.read_index(idx_path)
+        _faiss_index = faiss.read_index(idx_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
     except Exception:
-        _faiss_index = faiss.IndexFlatIP(384)
+        try:
+            _faiss_index = faiss.read_index(idx_path)
+        except Exception:
+            _faiss_index = faiss.IndexFlatIP(384)
     return _faiss_index
 
 
@@ -36,22 +42,38 @@ def _load_role_keys() -> List[str]:
     global _role_keys
     if _role_keys:
         return _role_keys
-    base = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "vector_store")
-    base = os.path.abspath(base)
-    keys_path = os.path.join(base, "role_keys.json")
+    keys_path = os.path.join(_STORE_DIR, "role_keys.json")
     if os.path.exists(keys_path):
         with open(keys_path, "r", encoding="utf-8") as f:
             _role_keys = json.load(f)
     return _role_keys
 
 
+def _search_matrix(matrix: np.ndarray, q: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    # matrix is the mmap itself; the product streams rows straight from the page cache
+    sims = q @ matrix.T
+    k = min(top_k, matrix.shape[0])
+    if k <= 0:
+        return np.zeros((q.shape[0], 0), dtype=np.float32), np.zeros((q.shape[0], 0), dtype=np.int64)
+    idx = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    top = np.take_along_axis(sims, idx, axis=1)
+    order = np.argsort(-top, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(idx, order, axis=1).astype(np.int64)
+
+
 def search_roles(resume_vec: np.ndarray, top_k: int = 10) -> Tuple[np.ndarray, np.ndarray, List[str]]:
-    faiss_index = _load_faiss()
-    keys = _load_role_keys()
+    """Top-k (scores, rows, row keys). Rows whose key is "" belong to removed roles."""
     if resume_vec.ndim == 1:
         q = resume_vec.reshape(1, -1)
     else:
         q = resume_vec
+    # Memory-mapped, ID-mapped catalog vectors shared by all workers
+    catalog = ensure_vectors()
+    if catalog.has_vectors and catalog.matrix.shape[1] == q.shape[1]:
+        D, I = _search_matrix(catalog.matrix, q.astype(np.float32, copy=False), top_k)
+        return D, I, catalog.row_keys
+    faiss_index = _load_faiss()
+    keys = _load_role_keys()
     try:
         import faiss  # type: ignore
     except Exception:
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import math
+import re
+import threading
+import numpy as np
+from scipy import sparse  # type: ignore
+
+from .embeddings import load_roles_data
+from .catalog import catalog_version
+
+_token_re = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+
+_STOPWORDS = frozenset(
+    """
+    a about above after again all also an and any are as at be been being both but by can could
+    did do does doing during each etc few for from further had has have having he her here how i
+    if in into is it its itself just may me more most must my no nor not of off on once only or
+    other our out over own per same she should so some such than that the their them then there
+    these they this those through to too under until up very via was we were what when where
+    which while who whom why will with within would you your yours
+    ability able across work working including related strong good excellent plus years year
+    role team teams using use used new well based level e.g. i.e.
+    experience experienced required requirements preferred responsibilities knowledge skills
+    familiarity understanding proficiency proficient candidate looking join bonus
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    for raw in _token_re.findall(text.lower()):
+        raw = raw.strip(".-")
+        if not raw:
+            continue
+        # Keep short slash compounds (ci/cd, ui/ux, a/b) whole; split lists like java/python/c++
+        parts = raw.split("/")
+        if len(parts) > 1 and any(len(p) > 2 for p in parts):
+            candidates = [p.strip(".-") for p in parts]
+        else:
+            candidates = [raw]
+        for tok in candidates:
+            if tok and tok not in _STOPWORDS and not tok.isdigit():
+                tokens.append(tok)
+    return tokens
+
+
+class KeywordIndex:
+    """BM25-weighted sparse term matrix over a fixed document collection.
+
+    Row i holds the saturated, IDF-weighted term weights of document i. A
+    resume is scored against every row at once as the weighted share of each
+    document's terms that the resume contains (one sparse mat-vec).
+    """
+
+    def __init__(self, keys: List[str], docs: List[str], k1: float = 1.2, b: float = 0.75) -> None:
+        self.keys = keys
+        self.row_of: Dict[str, int] = {k: i for i, k in enumerate(keys)}
+        self.k1 = k1
+        self.b = b
+        tokenized = [tokenize(d) for d in docs]
+        self.vocab: Dict[str, int] = {}
+        for toks in tokenized:
+            for t in toks:
+                if t not in self.vocab:
+                    self.vocab[t] = len(self.vocab)
+        self.terms: List[str] = [""] * len(self.vocab)
+        for t, j in self.vocab.items():
+            self.terms[j] = t
+        n_docs = max(1, len(docs))
+        self.avgdl = (sum(len(t) for t in tokenized) / n_docs) or 1.0
+
+        df = np.zeros(len(self.vocab), dtype=np.float32)
+        for toks in tokenized:
+            for t in set(toks):
+                df[self.vocab[t]] += 1
+        self.idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        # Terms never seen in the collection are as specific as it gets
+        self.oov_idf = float(math.log(1.0 + (n_docs + 0.5) / 0.5))
+
+        rows: List[int] = []
+        cols: List[int] = []
+        vals: List[float] = []
+        for i, toks in enumerate(tokenized):
+            for j, w in self._weights(toks, lambda t: self.vocab.get(t)):
+                rows.append(i)
+                cols.append(j)
+                vals.append(w)
+        self.matrix = sparse.csr_matrix(
+            (np.asarray(vals, dtype=np.float32), (rows, cols)),
+            shape=(len(docs), len(self.vocab)),
+            dtype=np.float32,
+        )
+        self.row_totals = np.asarray(self.matrix.sum(axis=1)).ravel() + 1e-12
+
+    def _weights(self, toks: List[str], column) -> List[Tuple[int, float]]:
+        counts = Counter(toks)
+        norm = self.k1 * (1.0 - self.b + self.b * len(toks) / self.avgdl)
+        out: List[Tuple[int, float]] = []
+        for t, tf in counts.items():
+            j = column(t)
+            idf = float(self.idf[j]) if j is not None and j < len(self.idf) else self.oov_idf
+            out.append((j, idf * tf * (self.k1 + 1.0) / (tf + norm)))
+        return out
+
+    def resume_indicator(self, resume_text: str, extra: Optional[Dict[str, int]] = None) -> np.ndarray:
+        """Binary presence vector of the resume's terms over the index vocabulary (+ extra columns)."""
+        width = len(self.vocab) + (len(extra) if extra else 0)
+        vec = np.zeros(width, dtype=np.float32)
+        for t in set(tokenize(resume_text)):
+            j = self.vocab.get(t)
+            if j is None and extra:
+                j = extra.get(t)
+            if j is not None:
+                vec[j] = 1.0
+        return vec
+
+    def score_roles(self, resume_text: str) -> Dict[str, float]:
+        """Weighted keyword coverage (0..1) of every indexed document by the resume."""
+        if not self.keys:
+            return {}
+        r = self.resume_indicator(resume_text)
+        scores = (self.matrix @ r) / self.row_totals
+        return {k: float(s) for k, s in zip(self.keys, scores.tolist())}
+
+    def _coverage_terms(self, term_weights: List[Tuple[str, float]], present: np.ndarray, top_n: int) -> List[Dict[str, object]]:
+        total = sum(w for _, w in term_weights) or 1.0
+        ranked = sorted(zip(term_weights, present.tolist()), key=lambda x: -x[0][1])[:top_n]
+        return [
+            {"term": t, "weight": round(w / total, 4), "present": bool(p)}
+            for (t, w), p in ranked
+        ]
+
+    def text_coverage(self, resume_text: str, doc_text: str, top_n: int = 25) -> Tuple[float, List[Dict[str, object]]]:
+        """Coverage of an ad-hoc document (e.g. a pasted JD), weighted with the collection's IDF."""
+        toks = tokenize(doc_text)
+        if not toks:
+            return 0.0, []
+        # Out-of-vocabulary JD terms get temporary columns past the end of the vocabulary
+        extra: Dict[str, int] = {}
+        for t in toks:
+            if t not in self.vocab and t not in extra:
+                extra[t] = len(self.vocab) + len(extra)
+        weights = self._weights(toks, lambda t: self.vocab.get(t, extra.get(t)))
+        width = len(self.vocab) + len(extra)
+        row = sparse.csr_matrix(
+            (np.asarray([w for _, w in weights], dtype=np.float32), ([0] * len(weights), [j for j, _ in weights])),
+            shape=(1, width),
+            dtype=np.float32,
+        )
+        r = self.resume_indicator(resume_text, extra)
+        score = float((row @ r)[0]) / (float(row.sum()) + 1e-12)
+        all_terms = self.terms + list(extra)
+        present = r[row.indices]
+        term_weights = [(all_terms[j], float(w)) for j, w in zip(row.indices.tolist(), row.data.tolist())]
+        return score, self._coverage_terms(term_weights, present, top_n)
+
+
+def role_document(category: str, role: str, meta: Dict[str, object]) -> str:
+    desc = meta.get("description") or role
+    skills = meta.get("skills") or []
+    return f"{role}\n{desc}\n{' '.join(str(s) for s in skills)}"  # type: ignore[union-attr]
+
+
+_role_index: Optional[KeywordIndex] = None
+_role_index_stamp: Optional[str] = None
+_role_index_lock = threading.Lock()
+
+
+def get_role_index() -> KeywordIndex:
+    """Sparse index over the role catalog, built once per catalog version."""
+    global _role_index, _role_index_stamp
+    stamp = catalog_version()
+    if _role_index is not None and _role_index_stamp == stamp:
+        return _role_index
+    with _role_index_lock:
+        if _role_index is None or _role_index_stamp != stamp:
+            keys: List[str] = []
+            docs: List[str] = []
+            for cat, roles in load_roles_data().items():
+                for role, meta in roles.items():
+                    keys.append(f"{cat}::{role}")
+                    docs.append(role_document(cat, role, meta))
+            _role_index = KeywordIndex(keys, docs)
+            _role_index_stamp = stamp
+        return _role_index
@@ -1,30 +1,58 @@
 from typing import List
 import io
+import os
 import re
 
 
+def max_resume_chars() -> int:
+    # A long resume is ~20k characters; anything past the cap is not read
+    return int(os.environ.get("MAX_RESUME_CHARS", "100000"))
+
+
 def parse_resume_bytes(content: bytes, filename: str) -> str:
+    """Extracted text, truncated to max_resume_chars().
+
+    Extraction stops as soon as the cap is reached, so oversized documents
+    (e.g. long scanned PDFs) never have every page's text in memory at once.
+    """
+    limit = max_resume_chars()
     lower = filename.lower()
     if lower.endswith(".pdf"):
         try:
             import pdfplumber  # type: ignore
             text_pages: List[str] = []
+            total = 0
+            # BytesIO shares the buffer of the bytes object, it does not copy it
             with pdfplumber.open(io.BytesIO(content)) as pdf:
                 for page in pdf.pages:
-                    text_pages.append(page.extract_text() or "")
-            return "\n".join(text_pages)
+                    page_text = page.extract_text() or ""
+                    # Drop the page's cached layout objects before moving on
+                    page.close()
+                    text_pages.append(page_text[: limit - total])
+                    total += len(text_pages[-1]) + 1
+                    if total >= limit:
+                        break
+            # Form feed marks page breaks so repeated headers/footers can be detected later
+            return "\f".join(text_pages)
         except Exception:
             pass
     if lower.endswith(".docx"):
         try:
             import docx  # python-docx
             doc = docx.Document(io.BytesIO(content))
-            return "\n".join(p.text for p in doc.paragraphs)
+            paragraphs: List[str] = []
+            total = 0
+            for p in doc.paragraphs:
+                paragraphs.append(p.text[: limit - total])
+                total += len(paragraphs[-1]) + 1
+                if total >= limit:
+                    break
+            return "\n".join(paragraphs)
         except Exception:
             pass
-    # Fallback: try decode as UTF-8
+    # Fallback: try decode as UTF-8 (a character is at most 4 bytes)
     try:
-        return content.decode("utf-8", errors="ignore")
+        return str(memoryview(content)[: limit * 4], "utf-8", "ignore")[:limit]
     except Exception:
         return ""
 
@@ -34,5 +62,3 @@ _whitespace_re = re.compile(r"\s+")
 
 def normalize_whitespace(text: str) -> str:
     return _whitespace_re.sub(" ", text).strip()
-
-
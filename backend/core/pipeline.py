@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import hashlib
+import os
+
+from . import parser, preprocessing, embeddings, scoring, sections
+from .admission import admit
+from backend.models.resume_model import UploadAnalyzeResponse, TopRole, KeywordCoverage, RevisionDelta, RoleDelta
+from backend.models.analysis_model import DetailedAnalysisResponse, CompareResponse, CompareRow
+
+
+# Called as on_progress(stage, partial) so background tasks can publish
+# intermediate results while the pipeline is still running.
+ProgressFn = Callable[[str, Dict[str, Any]], None]
+
+
+MAX_COMPARE_TARGETS = 50
+
+
+class PipelineInputError(ValueError):
+    """Raised when the uploaded document cannot be analyzed."""
+
+
+class UploadTooLargeError(PipelineInputError):
+    """Raised when the upload exceeds max_upload_bytes()."""
+
+
+def max_upload_bytes() -> int:
+    return int(os.environ.get("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+
+
+def _noop_progress(stage: str, partial: Dict[str, Any]) -> None:
+    return None
+
+
+def _section_skills(
+    texts: List[str],
+    fallback_text: str,
+    known: Dict[str, List[str]],
+) -> Tuple[List[str], Dict[str, List[str]]]:
+    """Skills per section (see sections.skill_texts), reusing `known` results for unchanged sections."""
+    if not texts:
+        return preprocessing.extract_skills(fallback_text), {}
+    per_section: Dict[str, List[str]] = {}
+    for text in texts:
+        key = embeddings.text_key(text)
+        if key not in per_section:
+            found = known.get(key)
+            per_section[key] = found if found is not None else preprocessing.extract_skills(parser.normalize_whitespace(text))
+    # Union in document order, as a single pass over the joined sections would give
+    skills = list(dict.fromkeys(s for found in per_section.values() for s in found))
+    return skills, per_section
+
+
+def analyze_upload(
+    content: bytes,
+    filename: str,
+    category: str,
+    job_description: Optional[str] = None,
+    on_progress: Optional[ProgressFn] = None,
+    previous_resume_id: Optional[str] = None,
+) -> UploadAnalyzeResponse:
+    """Analyze an upload; with `previous_resume_id` only the parts that changed are reprocessed.
+
+    A revision reuses the previous revision's per-section skills and chunk
+    vectors (keyed by text hash) and skips parsing and embedding entirely
+    when the bytes are identical. The response then carries a `revision` delta.
+    """
+    progress = on_progress or _noop_progress
+    if not content:
+        raise PipelineInputError("Empty file uploaded")
+    if len(content) > max_upload_bytes():
+        raise UploadTooLargeError(f"File exceeds the {max_upload_bytes()} byte upload limit")
+    previous: Optional[Dict[str, Any]] = None
+    if previous_resume_id:
+        previous = embeddings.load_cached_resume(previous_resume_id)
+        if previous is None:
+            raise LookupError("previous_resume_id not found")
+
+    content_sha = hashlib.sha1(content).hexdigest()
+    progress("parse", {})
+    prior: Dict[str, Any] = previous or {}
+    known_skills: Dict[str, List[str]] = prior.get("section_skills") or {}
+    if previous is not None and previous.get("content_sha") == content_sha:
+        # Identical bytes: nothing to parse, segment or embed again
+        cleaned_text = previous["text"]
+        extracted_skills, section_skills = list(previous.get("skills") or []), known_skills
+        progress("embed", {"extracted_skills": extracted_skills})
+        resume_vec, chunk_vectors = previous["vector"], previous.get("chunk_vectors") or {}
+        encoded, n_chunks = 0, len(chunk_vectors)
+    else:
+        with admit("parse"):
+            resume_text = parser.parse_resume_bytes(content, filename=filename or "uploaded")
+            if not resume_text.strip():
+                raise PipelineInputError("Could not extract text from file. Please upload a PDF or DOCX.")
+            cleaned_text = preprocessing.clean_text(resume_text)
+            # Segment before whitespace is flattened; contact/reference blocks are left out
+            segmented = sections.segment_resume(resume_text)
+            selected = sections.select_sections(segmented)
+            # Skills are read from every non-contact section, not only the weighted ones
+            skill_texts = sections.skill_texts(segmented)
+            # Only the cleaned text and the section texts are needed from here on
+            del resume_text, segmented
+
+        extracted_skills, section_skills = _section_skills(skill_texts, cleaned_text, known_skills)
+        progress("embed", {"extracted_skills": extracted_skills})
+
+        # Embed the high-signal sections only; unchanged chunks keep their vectors
+        chunks, weights = embeddings.resume_chunks(cleaned_text, sections=selected)
+        resume_vec, chunk_vectors, encoded = embeddings.embed_chunks(chunks, weights, known=prior.get("chunk_vectors"))
+        n_chunks = len(chunks)
+    preview = embeddings.resume_preview(cleaned_text)
+
+    # Compute top roles and ATS if JD provided
+    progress("score", {})
+    top_roles, ats_score, missing_skills_union, ats_details = scoring.compute_overview(
+        category=category,
+        resume_vector=resume_vec,
+        resume_skills=extracted_skills,
+        job_description=job_description,
+        resume_text=cleaned_text,
+    )
+    progress("score", {"top_roles": top_roles, "ats_score": ats_score})
+
+    revision: Optional[RevisionDelta] = None
+    if previous is not None and previous_resume_id:
+        delta = scoring.revision_delta(
+            previous,
+            resume_vector=resume_vec,
+            resume_text=cleaned_text,
+            resume_skills=extracted_skills,
+            top_roles=top_roles,
+            ats_score=ats_score,
+            job_description=job_description,
+        )
+        revision = RevisionDelta.model_construct(
+            previous_resume_id=previous_resume_id,
+            roles=[RoleDelta.model_construct(**r) for r in delta.pop("roles")],
+            sections_changed=sum(1 for k in section_skills if k not in known_skills),
+            chunks_embedded=encoded,
+            chunks_reused=n_chunks - encoded,
+            **delta,
+        )
+
+    suggestions_short = scoring.generate_short_suggestions(missing_skills_union, ats_score)
+    resume_id = embeddings.cache_resume_vector(
+        resume_vec,
+        preview,
+        skills=extracted_skills,
+        text=cleaned_text,
+        content_sha=content_sha,
+        section_skills=section_skills,
+        chunk_vectors=chunk_vectors,
+        top_roles=[f"{r['category']}::{r['role']}" for r in top_roles],
+    )
+
+    # Every field is produced by our own code above, so skip re-validating it
+    return UploadAnalyzeResponse.model_construct(
+        resume_id=resume_id,
+        top_roles=[TopRole.model_construct(**r) for r in top_roles],
+        ats_score=ats_score,
+        ats_dense=ats_details.get("ats_dense"),
+        ats_lexical=ats_details.get("ats_lexical"),
+        keyword_coverage=[KeywordCoverage.model_construct(**k) for k in ats_details.get("keyword_coverage", [])],
+        extracted_skills=extracted_skills,
+        missing_skills_union=missing_skills_union,
+        suggestions_short=suggestions_short,
+        revision=revision,
+    )
+
+
+def analyze_detailed(
+    resume_id: str,
+    choice: Dict[str, Any],
+    on_progress: Optional[ProgressFn] = None,
+) -> DetailedAnalysisResponse:
+    progress = on_progress or _noop_progress
+    record = embeddings.load_cached_resume(resume_id)
+    if record is None:
+        raise LookupError("resume_id not found")
+
+    progress("analyze", {})
+    return scoring.run_detailed_analysis(
+        choice=choice,
+        resume_vector=record["vector"],
+        resume_preview=record["preview"],
+        resume_skills=record.get("skills"),
+    )
+
+
+def compare(
+    resume_id: str,
+    roles: List[str],
+    job_descriptions: List[str],
+) -> CompareResponse:
+    record = embeddings.load_cached_resume(resume_id)
+    if record is None:
+        raise LookupError("resume_id not found")
+    if not roles and not job_descriptions:
+        raise PipelineInputError("Provide at least one role or job description to compare against")
+    if len(roles) + len(job_descriptions) > MAX_COMPARE_TARGETS:
+        raise PipelineInputError(f"At most {MAX_COMPARE_TARGETS} targets can be compared at once")
+
+    skills = record.get("skills")
+    if skills is None:
+        skills = preprocessing.extract_skills(record["preview"].lower())
+    rows, unknown = scoring.compare_targets(
+        resume_vector=record["vector"],
+        resume_text=record.get("text") or record["preview"],
+        resume_skills=skills,
+        roles=roles,
+        job_descriptions=job_descriptions,
+    )
+    return CompareResponse.model_construct(
+        resume_id=resume_id,
+        results=[CompareRow.model_construct(**r) for r in rows],
+        unknown_roles=unknown,
+    )
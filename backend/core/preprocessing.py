@@ -3,14 +3,14 @@ import re
 import os
 
 from .parser import normalize_whitespace
+from .skills import find_alias_mentions
+from .sections import strip_page_furniture
 
 
 def clean_text(text: str) -> str:
-    text = normalize_whitespace(text)
-    # Remove repeated page headers/footers heuristically
-    text = re.sub(r"\n?Page \d+ of \d+\n?", "\n", text, flags=re.IGNORECASE)
-    text = re.sub(r"\n?\d+\s*/\s*\d+\n?", "\n", text)
-    return text
+    # Remove page numbers and repeated headers/footers while lines still exist
+    text = strip_page_furniture(text)
+    return normalize_whitespace(text)
 
 
 def extract_skills(lower_text: str) -> List[str]:
@@ -25,6 +25,8 @@ def extract_skills(lower_text: str) -> List[str]:
                     continue
                 if re.search(rf"\b{re.escape(s)}\b", text):
                     skills.append(s)
+    # Aliases such as "k8s" or "postgres" resolve to their canonical skill
+    skills.extend(find_alias_mentions(text))
     # Deduplicate preserve order
     seen: Set[str] = set()
     uniq: List[str] = []
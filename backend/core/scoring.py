@@ -6,8 +6,12 @@ import json
 import numpy as np
 
 from .faiss_index import search_roles
-from .embeddings import embed_texts, load_roles_data
+from .catalog import ensure_vectors
+from .embeddings import embed_targets, load_roles_data
 from .preprocessing import extract_skills
+from .skills import match_skills, canonical_skills
+from .keyword_index import get_role_index
+from .admission import admit, llm_degrade_enabled, StageSaturatedError
 from backend.models.analysis_model import DetailedAnalysisResponse, GeminiPolishRequest
 import google.generativeai as genai
 
@@ -21,10 +25,12 @@ def compute_overview(
     resume_vector: np.ndarray,
     resume_skills: List[str],
     job_description: Optional[str],
+    resume_text: str = "",
 ) -> tuple[
     List[Dict[str, Any]],
     Optional[float],
     List[str],
+    Dict[str, Any],
 ]:
     # FAISS search (with graceful fallback)
     D, I, keys = search_roles(resume_vector, top_k=20)
@@ -59,23 +65,15 @@ def compute_overview(
             if len(top_candidates) >= 3:
                 break
     else:
-        # Fallback: compute role embeddings on the fly and rank by cosine similarity
-        role_texts: List[str] = []
-        key_list: List[str] = []
-        for cat, roles in role_data.items():
-            for role, meta in roles.items():
-                desc = meta.get("description") or role
-                role_texts.append(f"{cat}::{role} — {desc}")
-                key_list.append(f"{cat}::{role}")
-        if role_texts:
-            vecs = embed_texts(role_texts)
-            # L2 normalize
-            norms = np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12
-            vecs = (vecs / norms).astype(np.float32)
-            sims = (vecs @ resume_vector.reshape(-1, 1)).ravel()
+        # Fallback: rank every live role in the catalog by cosine similarity
+        catalog = ensure_vectors()
+        if catalog.has_vectors:
+            sims = np.asarray(catalog.matrix @ resume_vector).ravel()
             order = np.argsort(-sims)
             for idx in order:
-                key = key_list[int(idx)]
+                key = catalog.row_keys[int(idx)]
+                if not key:
+                    continue
                 sim = float(sims[int(idx)])
                 cat, role = key.split("::", 1)
                 if cat != category:
@@ -90,23 +88,208 @@ def compute_overview(
                 if len(top_candidates) >= 3:
                     break
 
-    # Missing skills union across top roles
+    # Keyword coverage of every role in one sparse mat-vec over the precomputed role index
+    if resume_text and top_candidates:
+        coverage = get_role_index().score_roles(resume_text)
+        for item in top_candidates:
+            cov = coverage.get(f"{item['category']}::{item['role']}")
+            if cov is not None:
+                item["keyword_coverage"] = round(cov * 100.0, 1)
+
+    # Missing skills union across top roles, deduplicated by canonical skill
     missing_union: set[str] = set()
     for item in top_candidates:
-        skills = set(s.lower() for s in item.get("skills", []))
-        present = skills.intersection(set(resume_skills))
-        missing = skills - present
-        missing_union.update(missing)
+        _, missing = match_skills(item.get("skills", []), resume_skills)
+        missing_union.update(canonical_skills(missing))
 
     ats_score: Optional[float] = None
+    ats_details: Dict[str, Any] = {}
+    if job_description:
+        ats_score, ats_details = compute_ats(resume_vector, resume_text, job_description)
+
+    return top_candidates, ats_score, sorted(missing_union), ats_details
+
+
+def compute_ats(
+    resume_vector: np.ndarray,
+    resume_text: str,
+    job_description: str,
+) -> Tuple[float, Dict[str, Any]]:
+    """Hybrid ATS score: dense cosine fused with BM25-weighted keyword coverage."""
+    # Cached by text, so re-checking revisions against the same JD never re-encodes it
+    jd_vec = embed_targets([job_description])[0]
+    dense = float(np.dot(resume_vector, jd_vec))
+    if not resume_text:
+        return round(dense * 100.0, 1), {"ats_dense": round(dense * 100.0, 1)}
+
+    lexical, coverage = get_role_index().text_coverage(resume_text, job_description)
+    fused = _fuse(dense, lexical)
+    return round(fused * 100.0, 1), {
+        "ats_dense": round(dense * 100.0, 1),
+        "ats_lexical": round(lexical * 100.0, 1),
+        "keyword_coverage": coverage,
+    }
+
+
+def _fuse(dense: float, lexical: Optional[float]) -> float:
+    if lexical is None:
+        return dense
+    alpha = float(os.environ.get("ATS_DENSE_WEIGHT", "0.5"))
+    return alpha * dense + (1.0 - alpha) * lexical
+
+
+def revision_delta(
+    previous: Dict[str, Any],
+    resume_vector: np.ndarray,
+    resume_text: str,
+    resume_skills: List[str],
+    top_roles: List[Dict[str, Any]],
+    ats_score: Optional[float],
+    job_description: Optional[str],
+) -> Dict[str, Any]:
+    """Score changes of a re-uploaded resume against its previous revision.
+
+    Both revisions are scored the same way here: role scores are dot products
+    with the live catalog rows and the previous ATS is recomputed against the
+    current JD (its vector comes from the target cache), so no encoder call
+    is made.
+    """
+    catalog = ensure_vectors()
+    prev_vector = previous["vector"]
+    keys = [f"{r['category']}::{r['role']}" for r in top_roles]
+    category = top_roles[0]["category"] if top_roles else None
+    # Roles that dropped out of the top list are reported too
+    keys += [k for k in previous.get("top_roles") or [] if k not in keys and k.split("::", 1)[0] == category]
+
+    roles: List[Dict[str, Any]] = []
+    for key in keys:
+        role_id = catalog.ids.get(key)
+        row = catalog.row_of_id.get(role_id) if role_id is not None else None
+        if row is None or not catalog.has_vectors:
+            continue
+        vec = catalog.matrix[row]
+        score = round(float(np.dot(vec, resume_vector)) * 100.0, 1)
+        prev = round(float(np.dot(vec, prev_vector)) * 100.0, 1)
+        cat, role = key.split("::", 1)
+        roles.append({"category": cat, "role": role, "score": score, "previous_score": prev, "delta": round(score - prev, 1)})
+
+    prev_ats: Optional[float] = None
     if job_description:
-        jd_vec = embed_texts([job_description])[0]
-        # normalize
-        jd_vec = (jd_vec / (np.linalg.norm(jd_vec) + 1e-12)).astype(np.float32)
-        sim = float(np.dot(resume_vector, jd_vec))
-        ats_score = round(sim * 100.0, 1)
+        prev_ats, _ = compute_ats(prev_vector, previous.get("text") or previous["preview"], job_description)
+
+    prev_skills = previous.get("skills") or []
+    prev_set, current_set = set(prev_skills), set(resume_skills)
+    return {
+        "ats_score": ats_score,
+        "previous_ats_score": prev_ats,
+        "ats_delta": round(ats_score - prev_ats, 1) if ats_score is not None and prev_ats is not None else None,
+        "roles": roles,
+        "skills_gained": [s for s in resume_skills if s not in prev_set],
+        "skills_lost": [s for s in prev_skills if s not in current_set],
+    }
+
 
-    return top_candidates, ats_score, sorted(missing_union)
+def compare_targets(
+    resume_vector: np.ndarray,
+    resume_text: str,
+    resume_skills: List[str],
+    roles: List[str],
+    job_descriptions: List[str],
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Rank one resume against many roles/JDs.
+
+    Roles are scored against their catalog rows, exactly as top_roles are;
+    only JD vectors come from the target cache (unseen texts are encoded in
+    one batch). Returns (ranked rows, unknown role keys).
+    """
+    role_map = _load_role_map()
+    targets: List[Dict[str, Any]] = []
+    unknown: List[str] = []
+    seen: set[str] = set()
+    for key in dict.fromkeys(roles):
+        if "::" in key:
+            cat, role = key.split("::", 1)
+        else:
+            # Bare role name: take the first category that has it
+            cat = next((c for c, rs in role_map.items() if key in rs), "")
+            role = key
+        meta = (role_map.get(cat, {}) or {}).get(role)
+        if meta is None:
+            unknown.append(key)
+            continue
+        if f"{cat}::{role}" in seen:
+            continue
+        seen.add(f"{cat}::{role}")
+        targets.append({
+            "kind": "ROLE",
+            "target": f"{cat}::{role}",
+            "category": cat,
+            "role": role,
+            "text": meta.get("description") or role,
+            "skills": meta.get("skills", []) or [],
+        })
+    for n, jd in enumerate(job_descriptions, start=1):
+        if not jd or not jd.strip():
+            continue
+        targets.append({
+            "kind": "JD",
+            "target": f"JD {n}",
+            "category": None,
+            "role": None,
+            "text": jd,
+            "skills": extract_skills(jd.lower()),
+        })
+    if not targets:
+        return [], unknown
+
+    dense = np.zeros(len(targets), dtype=np.float32)
+    catalog_at: List[int] = []
+    catalog_rows: List[int] = []
+    if any(t["kind"] == "ROLE" for t in targets):
+        catalog = ensure_vectors()
+        for i, t in enumerate(targets):
+            role_id = catalog.ids.get(t["target"]) if t["kind"] == "ROLE" and catalog.has_vectors else None
+            row = catalog.row_of_id.get(role_id) if role_id is not None else None
+            if row is not None:
+                catalog_at.append(i)
+                catalog_rows.append(row)
+        if catalog_rows:
+            dense[catalog_at] = catalog.matrix[catalog_rows] @ resume_vector
+    # JDs, plus any role the catalog has no vector for yet
+    scored = set(catalog_at)
+    embed_at = [i for i in range(len(targets)) if i not in scored]
+    if embed_at:
+        dense[embed_at] = embed_targets([targets[i]["text"] for i in embed_at]) @ resume_vector
+
+    index = get_role_index()
+    role_coverage: Dict[str, float] = {}
+    if resume_text and any(t["kind"] == "ROLE" for t in targets):
+        role_coverage = index.score_roles(resume_text)
+
+    rows: List[Dict[str, Any]] = []
+    for t, sim in zip(targets, dense.tolist()):
+        lexical: Optional[float] = None
+        if resume_text:
+            if t["kind"] == "ROLE":
+                lexical = role_coverage.get(t["target"])
+            else:
+                lexical, _ = index.text_coverage(resume_text, t["text"])
+        matched, missing = match_skills(t["skills"], resume_skills)
+        rows.append({
+            "target": t["target"],
+            "kind": t["kind"],
+            "category": t["category"],
+            "role": t["role"],
+            "score": round(_fuse(sim, lexical) * 100.0, 1),
+            "dense_score": round(sim * 100.0, 1),
+            "keyword_coverage": round(lexical * 100.0, 1) if lexical is not None else None,
+            "matched_skills": matched,
+            "missing_skills": missing,
+        })
+    rows.sort(key=lambda r: -r["score"])
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+    return rows, unknown
 
 
 def generate_short_suggestions(missing_skills_union: List[str], ats_score: Optional[float]) -> str:
@@ -123,6 +306,7 @@ def run_detailed_analysis(
     choice: Dict[str, Any],
     resume_vector: np.ndarray,
     resume_preview: str,
+    resume_skills: Optional[List[str]] = None,
 ) -> DetailedAnalysisResponse:
     # Choice can be {type: "JD"} or {type: "ROLE", category, role}
     role_label = None
@@ -144,14 +328,16 @@ def run_detailed_analysis(
             role_desc = role_meta.get("description") or role_name
             skills_for_role: List[str] = role_meta.get("skills", []) or []
             # role similarity
-            jd_vec = embed_texts([role_desc])[0]
-            jd_vec = (jd_vec / (np.linalg.norm(jd_vec) + 1e-12)).astype(np.float32)
+            jd_vec = embed_targets([role_desc])[0]
             role_sim = float(np.dot(resume_vector, jd_vec))
             role_score_display = round(role_sim * 100.0, 1)
             # matched/missing based on resume preview tokens
-            resume_sk = set(extract_skills(resume_preview.lower()))
-            matched = [s for s in skills_for_role if s.lower() in resume_sk][:10]
-            missing = [s for s in skills_for_role if s.lower() not in resume_sk][:10]
+            # Prefer the skills extracted from the full resume at upload time
+            if resume_skills is None:
+                resume_skills = extract_skills(resume_preview.lower())
+            matched_all, missing_all = match_skills(skills_for_role, resume_skills)
+            matched = matched_all[:10]
+            missing = missing_all[:10]
         except Exception:
             pass
 
@@ -180,6 +366,7 @@ def run_detailed_analysis(
     final_score: float = 80.0
     llm_polished_text: str = ""  # Initialize this variable
     gemini_timestamp: Optional[str] = None  # Track if response is from Gemini
+    degrade = llm_degrade_enabled()
 
     if api_key:
         print(f"DEBUG: API key found, attempting Gemini call for role: {role_label}")
@@ -188,7 +375,9 @@ def run_detailed_analysis(
             model_name = os.environ.get("GEMINI_MODEL", "gemini-1.5-flash")
             print(f"DEBUG: Using Gemini model: {model_name}")
             model = genai.GenerativeModel(model_name)
-            resp = model.generate_content(prompt)
+            # Fail fast instead of queueing when we are allowed to degrade to the template
+            with admit("llm", wait=not degrade):
+                resp = model.generate_content(prompt)
             
             # Debug the actual response
             print(f"DEBUG: Response object: {resp}")
@@ -239,6 +428,10 @@ def run_detailed_analysis(
                 gemini_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 print(f"DEBUG: Real Gemini response received at {gemini_timestamp}")
             llm_polished_text = text
+        except StageSaturatedError:
+            if not degrade:
+                raise
+            print("DEBUG: LLM stage saturated, using template fallback")
         except Exception as e:
             print(f"DEBUG: Gemini API error: {e}")
             # Provide a rich fallback response when Gemini is unavailable
@@ -341,8 +534,11 @@ def call_gemini(prompt: str) -> str:
         genai.configure(api_key=api_key)
         model_name = os.environ.get("GEMINI_MODEL", "gemini-1.5-flash")
         model = genai.GenerativeModel(model_name)
-        resp = model.generate_content(prompt)
+        with admit("llm"):
+            resp = model.generate_content(prompt)
         return resp.text or ""
+    except StageSaturatedError:
+        raise
     except Exception as ex:
         return f"Gemini error: {ex}"
 
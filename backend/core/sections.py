@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import math
+import os
+import re
+
+from .parser import normalize_whitespace
+
+
+class Section(NamedTuple):
+    label: str  # summary | experience | skills | projects | education | ... | contact
+    heading: str  # heading line as written, "" for the block before the first heading
+    text: str  # section body with line structure preserved
+
+
+_HEADINGS: Dict[str, List[str]] = {
+    "summary": ["summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about me", "about"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "internships", "internship",
+                   "relevant experience"],
+    "skills": ["skills", "technical skills", "key skills", "core competencies", "competencies",
+               "technologies", "tech stack", "tools", "tools and technologies", "skills and tools"],
+    "projects": ["projects", "personal projects", "academic projects", "key projects", "selected projects"],
+    "education": ["education", "academic background", "academics", "qualifications",
+                  "educational qualifications"],
+    "certifications": ["certifications", "certificates", "licenses", "licenses and certifications",
+                       "courses", "training"],
+    "achievements": ["achievements", "awards", "honors", "honours", "awards and achievements"],
+    "publications": ["publications", "research"],
+    "interests": ["interests", "hobbies", "hobbies and interests", "extracurricular activities"],
+    "languages": ["languages"],
+    "references": ["references", "referees"],
+}
+_HEADING_TO_LABEL: Dict[str, str] = {h: label for label, hs in _HEADINGS.items() for h in hs}
+
+# Sections not listed here get weight 0 and are not embedded (skills are still read from them).
+DEFAULT_SECTION_WEIGHTS: Dict[str, float] = {
+    "experience": 1.0,
+    "projects": 0.8,
+    "summary": 0.6,
+    "skills": 0.6,
+    "certifications": 0.4,
+    "achievements": 0.3,
+    "publications": 0.3,
+    "education": 0.3,
+}
+
+_page_number_re = re.compile(r"^\s*(?:page\s+)?\d{1,3}\s*(?:of|/)\s*\d{1,3}\s*$|^\s*[-–]?\s*\d{1,3}\s*[-–]?\s*$", re.IGNORECASE)
+
+
+def section_weights() -> Dict[str, float]:
+    """Default weights, overridable with SECTION_WEIGHTS="experience=1,skills=0.5,education=0"."""
+    weights = dict(DEFAULT_SECTION_WEIGHTS)
+    raw = os.environ.get("SECTION_WEIGHTS", "")
+    for part in raw.split(","):
+        if "=" not in part:
+            continue
+        name, value = part.split("=", 1)
+        try:
+            weights[name.strip().lower()] = float(value)
+        except ValueError:
+            continue
+    return weights
+
+
+# Only this many non-empty lines at the top/bottom of a page can be furniture
+_EDGE_LINES = 2
+
+
+def _edges(lines: List[str]) -> Tuple[List[int], List[int]]:
+    content = [i for i, ln in enumerate(lines) if ln.strip()]
+    return content[:_EDGE_LINES], content[-_EDGE_LINES:]
+
+
+def _furniture_key(line: str, page_no: Optional[int]) -> str:
+    key = normalize_whitespace(line).lower()
+    if page_no is None:
+        return key
+    # Mask only a standalone token equal to the page's own number ("Jane Doe | Page 2")
+    return re.sub(rf"(?<![\w.,:/-]){page_no}(?![\w.,:%])", "#", key)
+
+
+def strip_page_furniture(text: str) -> str:
+    """Drop page-number lines and headers/footers repeated across pages.
+
+    Pages are separated by form feeds (see parser.parse_resume_bytes). Only
+    the first and last two non-empty lines of a page are candidates. A top
+    line is furniture when the same line sits at the top of at least half of
+    the pages (two at minimum), bottoms likewise. Lines are compared exactly;
+    from three pages on, a standalone page number in them is ignored. Line
+    structure is preserved.
+    """
+    pages = [p.split("\n") for p in text.split("\f")]
+    for n, lines in enumerate(pages):
+        top, bottom = _edges(lines)
+        numbers = {i for i in top + bottom if _page_number_re.match(lines[i])}
+        pages[n] = [ln for i, ln in enumerate(lines) if i not in numbers]
+
+    if len(pages) >= 2:
+        fuzzy = len(pages) >= 3
+        edges = [_edges(lines) for lines in pages]
+        threshold = max(2, math.ceil(len(pages) / 2))
+        repeated: List[set[str]] = []
+        for side in (0, 1):
+            seen: Dict[str, int] = {}
+            for n, (lines, edge) in enumerate(zip(pages, edges)):
+                for k in {_furniture_key(lines[i], n + 1 if fuzzy else None) for i in edge[side]}:
+                    seen[k] = seen.get(k, 0) + 1
+            repeated.append({k for k, c in seen.items() if c >= threshold})
+        for n, (lines, edge) in enumerate(zip(pages, edges)):
+            drop = {
+                i for side in (0, 1) for i in edge[side]
+                if _furniture_key(lines[i], n + 1 if fuzzy else None) in repeated[side]
+            }
+            pages[n] = [ln for i, ln in enumerate(lines) if i not in drop]
+
+    return "\n".join("\n".join(lines) for lines in pages)
+
+
+def _heading_of(line: str) -> Optional[str]:
+    """Section label when the line is a bare heading ("Experience", "SKILLS:").
+
+    "Label: values" lines such as "Languages: Python, Java" or "Courses: ..."
+    are content of the current section, not headings.
+    """
+    stripped = line.strip().strip("#*•-–—=_|").strip().rstrip(":").strip()
+    if not stripped or len(stripped) > 60 or ":" in stripped:
+        return None
+    norm = re.sub(r"[^a-z& ]+", " ", stripped.lower()).replace("&", "and")
+    norm = normalize_whitespace(norm)
+    if len(norm.split()) > 4:
+        return None
+    return _HEADING_TO_LABEL.get(norm)
+
+
+def segment_resume(text: str) -> List[Section]:
+    """Split raw parsed text into labelled sections, keeping line structure."""
+    lines = strip_page_furniture(text).split("\n")
+    sections: List[Section] = []
+    label, heading, body = "contact", "", []
+    for line in lines:
+        found = _heading_of(line)
+        if found is not None:
+            if heading or any(ln.strip() for ln in body):
+                sections.append(Section(label, heading, "\n".join(body).strip()))
+            label, heading, body = found, line.strip(), []
+        else:
+            body.append(line)
+    if heading or any(ln.strip() for ln in body):
+        sections.append(Section(label, heading, "\n".join(body).strip()))
+    return sections
+
+
+def skill_texts(sections: List[Section]) -> List[str]:
+    """Texts scanned for skills: every section except the contact block.
+
+    Unlike select_sections this ignores weights, so skills listed under an
+    unweighted heading (e.g. "Languages") are still found.
+    """
+    if not any(s.heading for s in sections):
+        whole = "\n".join(s.text for s in sections).strip()
+        return [whole] if whole else []
+    return [s.text for s in sections if s.text and s.label != "contact"]
+
+
+def select_sections(
+    sections: List[Section],
+    weights: Optional[Dict[str, float]] = None,
+) -> List[Tuple[str, float]]:
+    """(text, weight) pairs of the sections worth embedding.
+
+    Falls back to the whole document at weight 1.0 when no known heading was
+    found, so unstructured resumes are handled exactly as before.
+    """
+    if weights is None:
+        weights = section_weights()
+    if not any(s.heading for s in sections):
+        whole = "\n".join(s.text for s in sections).strip()
+        return [(whole, 1.0)] if whole else []
+    selected = [(s.text, weights.get(s.label, 0.0)) for s in sections if s.text]
+    selected = [(t, w) for t, w in selected if w > 0]
+    if not selected:
+        whole = "\n".join(s.text for s in sections).strip()
+        return [(whole, 1.0)] if whole else []
+    return selected
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import numpy as np
+
+from .embeddings import embed_texts, load_roles_data, normalize_rows
+from .catalog import catalog_version
+from .admission import StageSaturatedError
+
+_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+_STORE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "vector_store"))
+_MATRIX_PATH = os.path.join(_STORE_DIR, "skill_matrix.npy")
+_TERMS_PATH = os.path.join(_STORE_DIR, "skill_terms.json")
+
+
+def _load_skill_list() -> List[str]:
+    path = os.path.join(_DATA_DIR, "skills.txt")
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [ln.strip().lower() for ln in f if ln.strip()]
+
+
+def load_aliases() -> Dict[str, List[str]]:
+    path = os.path.join(_DATA_DIR, "skill_aliases.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    return {k.lower(): [a.lower() for a in v] for k, v in raw.items()}
+
+
+class SkillOntology:
+    """Canonical skills and their aliases with one L2-normalized vector per term."""
+
+    def __init__(self, version: str, terms: List[str], canonical: List[str], matrix: Optional[np.ndarray]) -> None:
+        self.version = version
+        self.terms = terms
+        # canonical[i] is the canonical skill that terms[i] stands for
+        self.canonical = canonical
+        self.matrix = matrix
+        self.row_of: Dict[str, int] = {t: i for i, t in enumerate(terms)}
+        self.alias_to_canonical: Dict[str, str] = dict(zip(terms, canonical))
+        self._alias_re: Optional[re.Pattern[str]] = None
+
+    def canonicalize(self, skill: str) -> str:
+        s = skill.strip().lower()
+        return self.alias_to_canonical.get(s, s)
+
+    def alias_pattern(self) -> Optional[re.Pattern[str]]:
+        """Single alternation over every alias, longest first so multi-word aliases win."""
+        if self._alias_re is None:
+            aliases = [t for t, c in zip(self.terms, self.canonical) if t != c]
+            if not aliases:
+                return None
+            alts = "|".join(re.escape(a) for a in sorted(aliases, key=len, reverse=True))
+            self._alias_re = re.compile(rf"(?<![\w.+#])(?:{alts})(?![\w+#])")
+        return self._alias_re
+
+
+def _vocabulary() -> Tuple[List[str], List[str]]:
+    aliases = load_aliases()
+    alias_to_canonical = {a: c for c, alts in aliases.items() for a in alts if a != c}
+    canon: List[str] = []
+    for s in _load_skill_list():
+        canon.append(s)
+    for roles in load_roles_data().values():
+        for meta in roles.values():
+            canon.extend(s.strip().lower() for s in meta.get("skills", []) or [] if s.strip())
+    # A listed skill that is also an alias (e.g. "rest apis") stands for its canonical form
+    canon = [alias_to_canonical.get(c, c) for c in canon]
+    canon.extend(aliases.keys())
+
+    terms: List[str] = []
+    canonical: List[str] = []
+    seen: set[str] = set()
+    for c in canon:
+        if c not in seen:
+            seen.add(c)
+            terms.append(c)
+            canonical.append(c)
+    for c, alts in aliases.items():
+        for a in alts:
+            if a not in seen and a != c:
+                seen.add(a)
+                terms.append(a)
+                canonical.append(c)
+    return terms, canonical
+
+
+def _catalog_version(terms: Sequence[str], canonical: Sequence[str]) -> str:
+    h = hashlib.sha1()
+    for t, c in zip(terms, canonical):
+        h.update(f"{t}\t{c}\n".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _read_persisted(version: str, n_terms: int) -> Optional[np.ndarray]:
+    if not (os.path.exists(_MATRIX_PATH) and os.path.exists(_TERMS_PATH)):
+        return None
+    try:
+        with open(_TERMS_PATH, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != version:
+            return None
+        # Read-only map shared through the page cache by all workers
+        matrix = np.load(_MATRIX_PATH, mmap_mode="r")
+    except Exception:
+        return None
+    if matrix.ndim != 2 or matrix.shape[0] != n_terms:
+        return None
+    return matrix
+
+
+def _persist(version: str, terms: List[str], canonical: List[str], matrix: np.ndarray) -> None:
+    try:
+        os.makedirs(_STORE_DIR, exist_ok=True)
+        # Write to temp names then swap in so concurrent readers never see a torn pair
+        tmp_matrix = f"{_MATRIX_PATH}.{os.getpid()}.tmp.npy"
+        tmp_terms = f"{_TERMS_PATH}.{os.getpid()}.tmp"
+        np.save(tmp_matrix, matrix)
+        with open(tmp_terms, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "terms": terms, "canonical": canonical}, f, ensure_ascii=False)
+        os.replace(tmp_matrix, _MATRIX_PATH)
+        os.replace(tmp_terms, _TERMS_PATH)
+    except Exception as ex:
+        print(f"DEBUG: could not persist skill matrix: {ex}")
+
+
+def build_skill_matrix(terms: List[str]) -> np.ndarray:
+    return normalize_rows(embed_texts(terms))
+
+
+_ontology: Optional[SkillOntology] = None
+_ontology_stamp: Optional[Tuple[object, ...]] = None
+_ontology_lock = threading.Lock()
+# Set when the matrix build hit a saturated embed stage; the build is retried after it
+_retry_at: Optional[float] = None
+
+
+def _source_stamp() -> Tuple[object, ...]:
+    paths = [
+        os.path.join(_DATA_DIR, "skills.txt"),
+        os.path.join(_DATA_DIR, "skill_aliases.json"),
+    ]
+    return tuple(os.path.getmtime(p) if os.path.exists(p) else 0.0 for p in paths) + (catalog_version(),)
+
+
+def get_ontology() -> SkillOntology:
+    """Ontology for the current catalog version; the matrix is built once and persisted.
+
+    When the encoder is unavailable the ontology still carries aliases but no
+    matrix, and matching degrades to exact canonical comparison. A saturated
+    embed stage only degrades it until its retry-after has passed.
+    """
+    global _ontology, _ontology_stamp, _retry_at
+    stamp = _source_stamp()
+
+    def current() -> bool:
+        if _ontology is None or _ontology_stamp != stamp:
+            return False
+        return _retry_at is None or time.monotonic() < _retry_at
+
+    if current():
+        return _ontology  # type: ignore[return-value]
+    with _ontology_lock:
+        if current():
+            return _ontology  # type: ignore[return-value]
+        terms, canonical = _vocabulary()
+        version = _catalog_version(terms, canonical)
+        if _ontology is not None and _ontology.version == version and _retry_at is None:
+            _ontology_stamp = stamp
+            return _ontology
+        _retry_at = None
+        matrix = _read_persisted(version, len(terms))
+        if matrix is None and terms:
+            try:
+                matrix = build_skill_matrix(terms)
+                _persist(version, terms, canonical, matrix)
+            except StageSaturatedError as ex:
+                print(f"DEBUG: embed stage saturated, skill matrix build retried in {ex.retry_after}s")
+                _retry_at = time.monotonic() + ex.retry_after
+                matrix = None
+            except Exception as ex:
+                print(f"DEBUG: skill matrix unavailable, using exact matching: {ex}")
+                matrix = None
+        _ontology = SkillOntology(version, terms, canonical, matrix)
+        _ontology_stamp = stamp
+        return _ontology
+
+
+def canonical_skills(skills: Iterable[str]) -> List[str]:
+    """Skills resolved to their canonical form, deduplicated in order."""
+    ont = get_ontology()
+    return list(dict.fromkeys(ont.canonicalize(s) for s in skills if s and s.strip()))
+
+
+def find_alias_mentions(lower_text: str) -> List[str]:
+    """Canonical skills mentioned in the text only through an alias (e.g. "k8s")."""
+    ont = get_ontology()
+    pattern = ont.alias_pattern()
+    if pattern is None:
+        return []
+    found: List[str] = []
+    for m in pattern.finditer(lower_text):
+        found.append(ont.alias_to_canonical[m.group(0)])
+    return found
+
+
+def match_skills(
+    role_skills: Iterable[str],
+    resume_skills: Iterable[str],
+    threshold: Optional[float] = None,
+) -> Tuple[List[str], List[str]]:
+    """Split role_skills into (matched, missing) against the resume's skills.
+
+    A role skill matches when it resolves to the same canonical skill as a
+    resume skill, or when the cosine between their precomputed vectors is at
+    least `threshold`. All similarities come from one matrix product over
+    rows of the persisted skill matrix, so no encoder call is made here.
+    """
+    if threshold is None:
+        threshold = float(os.environ.get("SKILL_MATCH_THRESHOLD", "0.75"))
+    role_list = [s for s in role_skills if s and s.strip()]
+    ont = get_ontology()
+    resume_canon = {ont.canonicalize(s) for s in resume_skills if s and s.strip()}
+
+    hit = [ont.canonicalize(s) in resume_canon for s in role_list]
+
+    if ont.matrix is not None and resume_canon and not all(hit):
+        pending = [i for i, h in enumerate(hit) if not h]
+        role_rows = [ont.row_of.get(role_list[i].strip().lower()) for i in pending]
+        resume_rows = [ont.row_of[c] for c in resume_canon if c in ont.row_of]
+        known = [(i, r) for i, r in zip(pending, role_rows) if r is not None]
+        if known and resume_rows:
+            sims = ont.matrix[[r for _, r in known]] @ ont.matrix[resume_rows].T
+            best = sims.max(axis=1)
+            for (i, _), score in zip(known, best.tolist()):
+                if score >= threshold:
+                    hit[i] = True
+
+    matched = [s for s, h in zip(role_list, hit) if h]
+    missing = [s for s, h in zip(role_list, hit) if not h]
+    return matched, missing
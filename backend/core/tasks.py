@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+import orjson
+
+from .admission import blocking
+from .pipeline import ProgressFn
+
+
+# Lower value runs first.
+PRIORITIES: Dict[str, int] = {"high": 0, "normal": 1, "low": 2}
+
+TaskFn = Callable[[ProgressFn], Any]
+
+
+class QueueFullError(RuntimeError):
+    """The global queue is at its configured depth or holds too many upload bytes."""
+
+
+class ClientLimitError(RuntimeError):
+    """A single client already has too many pending tasks."""
+
+
+class Task:
+    def __init__(self, kind: str, fn: TaskFn, client_id: str, priority: str, size: int = 0) -> None:
+        self.id = f"t_{uuid.uuid4().hex[:16]}"
+        self.kind = kind
+        self.client_id = client_id
+        self.priority = priority
+        # Bytes the task's closure holds (the raw upload) until it finishes
+        self.size = size
+        self.status = "queued"  # queued | running | succeeded | failed
+        self.stage: Optional[str] = None
+        self.partial: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Bumped on every state change so pollers/subscribers can detect updates
+        self.version = 0
+        self._fn = fn
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def snapshot(self) -> Dict[str, Any]:
+        result = self.result
+        if hasattr(result, "model_dump"):
+            result = result.model_dump()
+        return {
+            "task_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "stage": self.stage,
+            "partial": dict(self.partial),
+            "result": result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "version": self.version,
+        }
+
+
+class TaskStore:
+    """Task snapshots in a sqlite file shared by every worker process on the host.
+
+    Each process runs its own queue; the store lets a status poll or event
+    stream that lands on another uvicorn worker still find the task. Writes
+    only ever move a task forward (higher `version`), so out-of-order writes
+    from different threads are harmless.
+    """
+
+    def __init__(self, path: str, retention_seconds: float) -> None:
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id TEXT PRIMARY KEY, version INTEGER NOT NULL, finished_at REAL, data BLOB NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def put(self, snap: Dict[str, Any]) -> None:
+        try:
+            data = orjson.dumps(snap, option=orjson.OPT_SERIALIZE_NUMPY)
+            with self._conn() as conn:
+                conn.execute(
+                    "INSERT INTO tasks (id, version, finished_at, data) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET version = excluded.version, "
+                    "finished_at = excluded.finished_at, data = excluded.data "
+                    "WHERE excluded.version > tasks.version",
+                    (snap["task_id"], snap["version"], snap["finished_at"], data),
+                )
+        except (sqlite3.Error, TypeError) as ex:
+            print(f"DEBUG: task store write failed for {snap.get('task_id')}: {ex}")
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            row = self._conn().execute("SELECT data FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        except sqlite3.Error as ex:
+            print(f"DEBUG: task store read failed for {task_id}: {ex}")
+            return None
+        return orjson.loads(row[0]) if row else None
+
+    def purge(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        try:
+            with self._conn() as conn:
+                conn.execute("DELETE FROM tasks WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,))
+        except sqlite3.Error as ex:
+            print(f"DEBUG: task store purge failed: {ex}")
+
+
+class TaskQueue:
+    """Bounded in-process worker pool with priority lanes and per-client caps.
+
+    Workers always take the oldest task from the highest-priority lane whose
+    client is below its concurrency cap, so one client flooding the queue
+    cannot starve everybody else. Besides the task count, the queue bounds
+    the upload bytes its tasks hold until they finish. Caps are per process;
+    with several uvicorn workers, pass a `store` so any of them can answer
+    for a task.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queued: int = 100,
+        client_concurrency: int = 1,
+        client_max_pending: int = 10,
+        retention_seconds: float = 3600.0,
+        max_retained: int = 500,
+        max_queued_bytes: int = 256 * 1024 * 1024,
+        store: Optional[TaskStore] = None,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.client_concurrency = max(1, client_concurrency)
+        self.client_max_pending = client_max_pending
+        self.retention_seconds = retention_seconds
+        self.max_retained = max(0, max_retained)
+        self.max_queued_bytes = max_queued_bytes
+        self.store = store
+        self._held_bytes = 0
+        self._lanes: Dict[int, Deque[Task]] = {p: deque() for p in sorted(set(PRIORITIES.values()))}
+        self._tasks: Dict[str, Task] = {}
+        # Finished task ids, oldest first, so eviction never scans every task
+        self._finished: Deque[str] = deque()
+        self._running: Dict[str, int] = {}
+        self._pending: Dict[str, int] = {}
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def _ensure_workers(self) -> None:
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"task-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _queued_count(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def _evict_finished(self) -> None:
+        """Drop finished tasks (and their results) past retention or beyond max_retained."""
+        cutoff = time.time() - self.retention_seconds
+        while self._finished:
+            task = self._tasks.get(self._finished[0])
+            if task is not None and len(self._finished) <= self.max_retained and (task.finished_at or 0) >= cutoff:
+                break
+            self._finished.popleft()
+            if task is not None:
+                del self._tasks[task.id]
+
+    def submit(self, kind: str, fn: TaskFn, client_id: str, priority: str = "normal", size: int = 0) -> Task:
+        """Queue `fn`; `size` is the number of bytes it holds (e.g. the upload) until it finishes."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'. Use one of: {', '.join(PRIORITIES)}")
+        with self._cond:
+            self._evict_finished()
+            if self._queued_count() >= self.max_queued:
+                raise QueueFullError("Task queue is full")
+            if self._held_bytes and self._held_bytes + size > self.max_queued_bytes:
+                raise QueueFullError("Task queue is holding too many uploads")
+            if self._pending.get(client_id, 0) >= self.client_max_pending:
+                raise ClientLimitError("Too many pending tasks for this client")
+            task = Task(kind, fn, client_id, priority, size=size)
+            self._tasks[task.id] = task
+            self._pending[client_id] = self._pending.get(client_id, 0) + 1
+            self._held_bytes += size
+            self._lanes[PRIORITIES[priority]].append(task)
+            self._ensure_workers()
+            self._cond.notify_all()
+            snap = task.snapshot()
+        self._publish(snap)
+        return task
+
+    def _publish(self, snap: Dict[str, Any]) -> None:
+        # Called outside the lock; the store ignores writes older than what it has
+        if self.store is not None:
+            self.store.put(snap)
+
+    def get(self, task_id: str) -> Optional[Task]:
+        with self._cond:
+            self._evict_finished()
+            return self._tasks.get(task_id)
+
+    def snapshot(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Consistent view of a task, including its position while still queued.
+
+        Tasks owned by another worker process come from the store, without a
+        queue position.
+        """
+        with self._cond:
+            self._evict_finished()
+            task = self._tasks.get(task_id)
+            if task is not None:
+                snap = task.snapshot()
+                snap["queue_position"] = self._position(task)
+                return snap
+        if self.store is None:
+            return None
+        snap = self.store.get(task_id)
+        if snap is not None:
+            snap["queue_position"] = None
+        return snap
+
+    def _position(self, task: Task) -> Optional[int]:
+        if task.status != "queued":
+            return None
+        ahead = 0
+        for prio in sorted(self._lanes):
+            for t in self._lanes[prio]:
+                if t is task:
+                    return ahead
+                ahead += 1
+        return None
+
+    def _next_runnable(self) -> Optional[Task]:
+        for prio in sorted(self._lanes):
+            lane = self._lanes[prio]
+            for t in lane:
+                if self._running.get(t.client_id, 0) < self.client_concurrency:
+                    lane.remove(t)
+                    return t
+        return None
+
+    def _update(self, task: Task, **fields: Any) -> None:
+        with self._cond:
+            for k, v in fields.items():
+                setattr(task, k, v)
+            task.version += 1
+            self._cond.notify_all()
+            snap = task.snapshot()
+        self._publish(snap)
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                task = self._next_runnable()
+                while task is None:
+                    self._cond.wait()
+                    task = self._next_runnable()
+                self._running[task.client_id] = self._running.get(task.client_id, 0) + 1
+                task.status = "running"
+                task.started_at = time.time()
+                task.version += 1
+                snap = task.snapshot()
+            self._publish(snap)
+
+            def progress(stage: str, partial: Dict[str, Any], _task: Task = task) -> None:
+                with self._cond:
+                    _task.stage = stage
+                    _task.partial.update(partial)
+                    _task.version += 1
+                    self._cond.notify_all()
+                    snap = _task.snapshot()
+                self._publish(snap)
+
+            try:
+                # A busy stage delays the task rather than failing it
+                with blocking():
+                    result = task._fn(progress)
+                self._update(task, status="succeeded", result=result, finished_at=time.time())
+            except Exception as ex:
+                self._update(task, status="failed", error=str(ex) or ex.__class__.__name__, finished_at=time.time())
+            finally:
+                with self._cond:
+                    self._running[task.client_id] -= 1
+                    if not self._running[task.client_id]:
+                        del self._running[task.client_id]
+                    self._pending[task.client_id] -= 1
+                    if not self._pending[task.client_id]:
+                        del self._pending[task.client_id]
+                    task._fn = None  # type: ignore[assignment]  # release captured upload bytes
+                    self._held_bytes -= task.size
+                    self._finished.append(task.id)
+                    self._evict_finished()
+                    self._cond.notify_all()
+                if self.store is not None:
+                    self.store.purge()
+
+
+_queue: Optional[TaskQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_task_queue() -> TaskQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            retention = float(os.environ.get("TASK_RETENTION_SECONDS", "3600"))
+            # Shared by the uvicorn workers of one host; "" keeps tasks in-process only
+            store_path = os.environ.get(
+                "TASK_STORE_PATH", os.path.join(tempfile.gettempdir(), "resume-analyzer-tasks.sqlite3")
+            )
+            _queue = TaskQueue(
+                workers=int(os.environ.get("TASK_WORKERS", "2")),
+                max_queued=int(os.environ.get("TASK_MAX_QUEUED", "100")),
+                client_concurrency=int(os.environ.get("TASK_CLIENT_CONCURRENCY", "1")),
+                client_max_pending=int(os.environ.get("TASK_CLIENT_MAX_PENDING", "10")),
+                retention_seconds=retention,
+                max_retained=int(os.environ.get("TASK_MAX_RETAINED", "500")),
+                max_queued_bytes=int(os.environ.get("TASK_MAX_QUEUED_BYTES", str(256 * 1024 * 1024))),
+                store=TaskStore(store_path, retention) if store_path else None,
+            )
+        return _queue
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
@@ -11,11 +12,12 @@ try:
 except Exception:
     pass
 
-from backend.routers import resume, jobs, analysis, suggestions
+from backend.routers import resume, jobs, analysis, suggestions, tasks, compare, admin
+from backend.core import admission
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Resume Analyzer API", version="0.1.0")
+    app = FastAPI(title="Resume Analyzer API", version="0.1.0", default_response_class=ORJSONResponse)
 
     # CORS configuration
     app.add_middleware(
@@ -45,10 +47,21 @@ def create_app() -> FastAPI:
         
         return response
 
+    @app.exception_handler(admission.StageSaturatedError)
+    async def stage_saturated(request: Request, exc: admission.StageSaturatedError):
+        return ORJSONResponse(
+            status_code=503,
+            content={"detail": str(exc), "stage": exc.stage},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
     app.include_router(jobs.router, prefix="/api")
     app.include_router(resume.router, prefix="/api")
     app.include_router(analysis.router, prefix="/api")
     app.include_router(suggestions.router, prefix="/api")
+    app.include_router(tasks.router, prefix="/api")
+    app.include_router(compare.router, prefix="/api")
+    app.include_router(admin.router, prefix="/api")
     return app
 
 
@@ -57,6 +70,6 @@ app = create_app()
 
 @app.get("/api/health")
 async def health() -> dict:
-    return {"status": "ok"}
+    return {"status": "ok", "admission": admission.stats()}
 
 
@@ -41,3 +41,28 @@ class GeminiPolishResponse(BaseModel):
     text: str
 
 
+class CompareRequest(BaseModel):
+    resume_id: str
+    roles: List[str] = []  # "category::role" keys (a bare role name also works)
+    job_descriptions: List[str] = []
+
+
+class CompareRow(BaseModel):
+    rank: int
+    target: str  # role key or "JD n"
+    kind: str  # "ROLE" | "JD"
+    category: Optional[str] = None
+    role: Optional[str] = None
+    score: float
+    dense_score: float
+    keyword_coverage: Optional[float] = None
+    matched_skills: List[str]
+    missing_skills: List[str]
+
+
+class CompareResponse(BaseModel):
+    resume_id: str
+    results: List[CompareRow]
+    unknown_roles: List[str] = []
+
+
@@ -1,10 +1,32 @@
 from __future__ import annotations
 
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 
 class RolesResponse(BaseModel):
     data: Dict[str, Any]
 
 
+class RoleUpsertRequest(BaseModel):
+    category: str
+    role: str
+    description: str
+    skills: List[str] = []
+    create_category: bool = True
+
+
+class CategoryRequest(BaseModel):
+    category: str
+
+
+class CatalogStatsResponse(BaseModel):
+    version: int
+    categories: int
+    roles: int
+    rows: int
+    dead_rows: int
+    next_id: int
+    role_id: Optional[int] = None
+
+
@@ -9,14 +9,44 @@ class TopRole(BaseModel):
     role: str
     score: float
     skills: List[str]
+    keyword_coverage: Optional[float] = None  # share of the role's weighted keywords found in the resume
+
+
+class KeywordCoverage(BaseModel):
+    term: str
+    weight: float  # share of the JD's total keyword weight
+    present: bool
+
+
+class RoleDelta(BaseModel):
+    category: str
+    role: str
+    score: float
+    previous_score: float
+    delta: float
+
+
+class RevisionDelta(BaseModel):
+    previous_resume_id: str
+    ats_score: Optional[float] = None
+    previous_ats_score: Optional[float] = None
+    ats_delta: Optional[float] = None
+    roles: List[RoleDelta] = []
+    skills_gained: List[str] = []
+    skills_lost: List[str] = []
+    sections_changed: int = 0  # embedded sections whose text differs from the previous revision
+    chunks_embedded: int = 0
+    chunks_reused: int = 0
 
 
 class UploadAnalyzeResponse(BaseModel):
     resume_id: str
     top_roles: List[TopRole]
     ats_score: Optional[float] = None
+    ats_dense: Optional[float] = None
+    ats_lexical: Optional[float] = None
+    keyword_coverage: List[KeywordCoverage] = []
     extracted_skills: List[str]
     missing_skills_union: List[str]
     suggestions_short: str
-
-
+    revision: Optional[RevisionDelta] = None  # set when previous_resume_id was given
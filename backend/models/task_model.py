@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+
+from .analysis_model import DetailedAnalysisRequest
+
+
+class TaskDetailedAnalysisRequest(DetailedAnalysisRequest):
+    priority: str = "normal"
+
+
+class TaskAccepted(BaseModel):
+    task_id: str
+    status: str
+    status_url: str
+    events_url: str
+
+
+class TaskStatusResponse(BaseModel):
+    task_id: str
+    kind: str
+    status: str  # queued | running | succeeded | failed
+    priority: str
+    stage: Optional[str] = None
+    queue_position: Optional[int] = None
+    partial: Dict[str, Any] = {}
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    version: int
+
+
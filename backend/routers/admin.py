@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+import hmac
+import os
+from backend.core import catalog
+from backend.models.job_model import RoleUpsertRequest, CategoryRequest, CatalogStatsResponse
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    # Admin endpoints stay disabled until ADMIN_TOKEN is configured
+    expected = os.environ.get("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Catalog administration is disabled. Set ADMIN_TOKEN to enable it.")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+def _stats(cat: catalog.RoleCatalog, key: Optional[str] = None) -> CatalogStatsResponse:
+    return CatalogStatsResponse(**cat.stats(), role_id=cat.ids.get(key) if key else None)
+
+
+async def _run(fn, *args, **kwargs) -> catalog.RoleCatalog:
+    try:
+        # Encoding the changed role blocks, so keep it off the event loop
+        return await run_in_threadpool(fn, *args, **kwargs)
+    except catalog.CatalogError as ex:
+        raise HTTPException(status_code=400, detail=str(ex))
+
+
+@router.get("/catalog", response_model=CatalogStatsResponse)
+async def catalog_stats() -> CatalogStatsResponse:
+    return _stats(catalog.get_catalog())
+
+
+@router.post("/catalog/compact", response_model=CatalogStatsResponse, status_code=202)
+async def compact_catalog() -> CatalogStatsResponse:
+    cat = catalog.get_catalog()
+    catalog.schedule_compaction()
+    return _stats(cat)
+
+
+@router.post("/catalog/import", response_model=CatalogStatsResponse)
+async def import_jobs_file() -> CatalogStatsResponse:
+    # Applies hand edits of backend/data/jobs.json; the manifest is authoritative otherwise
+    return _stats(await _run(catalog.import_jobs_file))
+
+
+@router.put("/roles", response_model=CatalogStatsResponse)
+async def upsert_role(payload: RoleUpsertRequest) -> CatalogStatsResponse:
+    meta = {"description": payload.description, "skills": payload.skills}
+    cat = await _run(catalog.upsert_role, payload.category, payload.role, meta, create_category=payload.create_category)
+    return _stats(cat, f"{payload.category}::{payload.role}")
+
+
+@router.delete("/roles", response_model=CatalogStatsResponse)
+async def remove_role(category: str, role: str) -> CatalogStatsResponse:
+    return _stats(await _run(catalog.remove_role, category, role))
+
+
+@router.put("/categories", response_model=CatalogStatsResponse)
+async def add_category(payload: CategoryRequest) -> CatalogStatsResponse:
+    return _stats(await _run(catalog.add_category, payload.category))
+
+
+@router.delete("/categories", response_model=CatalogStatsResponse)
+async def remove_category(category: str) -> CatalogStatsResponse:
+    return _stats(await _run(catalog.remove_category, category))
@@ -1,22 +1,19 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from backend.models.analysis_model import DetailedAnalysisRequest, DetailedAnalysisResponse
-from backend.core import scoring, embeddings
+from backend.core import pipeline
 
 
 router = APIRouter(prefix="/detailed_analysis", tags=["analysis"]) 
 
 
-@router.post("")
-async def detailed_analysis(payload: DetailedAnalysisRequest) -> DetailedAnalysisResponse:
-    resume_vec, resume_preview = embeddings.load_cached_resume_vector(payload.resume_id)
-    if resume_vec is None:
+@router.post("", response_model=DetailedAnalysisResponse)
+async def detailed_analysis(payload: DetailedAnalysisRequest) -> ORJSONResponse:
+    try:
+        report = await run_in_threadpool(pipeline.analyze_detailed, payload.resume_id, payload.choice)
+    except LookupError:
         raise HTTPException(status_code=404, detail="resume_id not found")
-
-    report = scoring.run_detailed_analysis(
-        choice=payload.choice,
-        resume_vector=resume_vec,
-        resume_preview=resume_preview,
-    )
-    return report
+    return ORJSONResponse(report.model_dump())
 
 
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from backend.models.analysis_model import CompareRequest, CompareResponse
+from backend.core import pipeline
+
+
+router = APIRouter(prefix="/compare", tags=["analysis"])
+
+
+@router.post("", response_model=CompareResponse)
+async def compare(payload: CompareRequest) -> ORJSONResponse:
+    try:
+        result = await run_in_threadpool(
+            pipeline.compare,
+            payload.resume_id,
+            payload.roles,
+            payload.job_descriptions,
+        )
+    except LookupError:
+        raise HTTPException(status_code=404, detail="resume_id not found")
+    except pipeline.PipelineInputError as ex:
+        raise HTTPException(status_code=400, detail=str(ex))
+    return ORJSONResponse(result.model_dump())
+
+
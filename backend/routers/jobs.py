@@ -1,13 +1,26 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from typing import Dict, Any
-from backend.core.embeddings import load_roles_data
+from backend.core.catalog import get_catalog_payload
 
 
 router = APIRouter(prefix="/roles", tags=["jobs"]) 
 
 
-@router.get("")
-async def get_roles() -> Dict[str, Any]:
-    return load_roles_data()
+@router.get("", response_model=Dict[str, Any])
+async def get_roles(request: Request) -> Response:
+    # Serialized and compressed once per catalog version; requests only pick an encoding
+    payload = get_catalog_payload()
+    headers = {
+        "ETag": payload.etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "public, max-age=60",
+    }
+    if request.headers.get("if-none-match") == payload.etag:
+        return Response(status_code=304, headers=headers)
+    encoding = payload.best_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is None:
+        return Response(content=payload.raw, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=payload.encoded[encoding], media_type="application/json", headers=headers)
 
 
@@ -1,53 +1,45 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from typing import Optional
-from backend.core import parser, preprocessing, embeddings, scoring
+from backend.core import pipeline
 from backend.models.resume_model import UploadAnalyzeResponse
 
 
 router = APIRouter(prefix="/upload_and_analyze", tags=["resume"]) 
 
 
-@router.post("")
+@router.post("", response_model=UploadAnalyzeResponse)
 async def upload_and_analyze(
     file: UploadFile = File(...),
     category: str = Form(...),
     selected_role: Optional[str] = Form(None),
     job_description: Optional[str] = Form(None),
-) -> UploadAnalyzeResponse:
+    previous_resume_id: Optional[str] = Form(None),
+) -> ORJSONResponse:
     if file.content_type not in ("application/pdf", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"):
         # fallback: accept any; we'll still try to decode
         pass
 
-    content = await file.read()
-    if not content:
-        raise HTTPException(status_code=400, detail="Empty file uploaded")
-    resume_text = parser.parse_resume_bytes(content, filename=file.filename or "uploaded")
-    if not resume_text.strip():
-        raise HTTPException(status_code=400, detail="Could not extract text from file. Please upload a PDF or DOCX.")
-    cleaned_text = preprocessing.clean_text(resume_text)
-
-    extracted_skills = preprocessing.extract_skills(cleaned_text)
-
-    # Embed resume text
-    resume_vec, preview = embeddings.embed_resume_text(cleaned_text)
-
-    # Compute top roles and ATS if JD provided
-    top_roles, ats_score, missing_skills_union = scoring.compute_overview(
-        category=category,
-        resume_vector=resume_vec,
-        resume_skills=extracted_skills,
-        job_description=job_description,
-    )
-
-    suggestions_short = scoring.generate_short_suggestions(missing_skills_union, ats_score)
-
-    return UploadAnalyzeResponse(
-        resume_id=embeddings.cache_resume_vector(resume_vec, preview),
-        top_roles=top_roles,
-        ats_score=ats_score,
-        extracted_skills=extracted_skills,
-        missing_skills_union=missing_skills_union,
-        suggestions_short=suggestions_short,
-    )
+    # Never read more than the cap (+1 byte to detect oversize) into memory
+    content = await file.read(pipeline.max_upload_bytes() + 1)
+    try:
+        # Run off the event loop so stage admission can wait without stalling other requests
+        result = await run_in_threadpool(
+            pipeline.analyze_upload,
+            content,
+            filename=file.filename or "uploaded",
+            category=category,
+            job_description=job_description,
+            previous_resume_id=previous_resume_id,
+        )
+    except LookupError as ex:
+        raise HTTPException(status_code=404, detail=str(ex))
+    except pipeline.UploadTooLargeError as ex:
+        raise HTTPException(status_code=413, detail=str(ex))
+    except pipeline.PipelineInputError as ex:
+        raise HTTPException(status_code=400, detail=str(ex))
+    # Returning a Response skips FastAPI's second validation pass over the model
+    return ORJSONResponse(result.model_dump())
 
 
@@ -1,4 +1,5 @@
 from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
 from backend.models.analysis_model import GeminiPolishRequest, GeminiPolishResponse
 from backend.core.scoring import build_gemini_prompt, call_gemini
 
@@ -9,7 +10,7 @@ router = APIRouter(prefix="/suggestions", tags=["suggestions"])
 @router.post("/polish")
 async def polish(payload: GeminiPolishRequest) -> GeminiPolishResponse:
     prompt = build_gemini_prompt(payload)
-    output = call_gemini(prompt)
+    output = await run_in_threadpool(call_gemini, prompt)
     return GeminiPolishResponse(text=output)
 
 
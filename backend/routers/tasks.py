@@ -0,0 +1,125 @@
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Union
+import asyncio
+import ipaddress
+import os
+import orjson
+from backend.core import pipeline
+from backend.core.tasks import get_task_queue, QueueFullError, ClientLimitError, TaskFn
+from backend.models.task_model import TaskAccepted, TaskDetailedAnalysisRequest, TaskStatusResponse
+
+
+router = APIRouter(prefix="/tasks", tags=["tasks"])
+
+
+def _trusted_proxies() -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    raw = os.environ.get("TRUSTED_PROXIES", "")
+    return [ipaddress.ip_network(p.strip(), strict=False) for p in raw.split(",") if p.strip()]
+
+
+def _client_id(request: Request) -> str:
+    """Per-client caps are keyed on the peer address, never on anything the client sends.
+
+    Behind a reverse proxy listed in TRUSTED_PROXIES (IPs or CIDRs) the
+    address the proxy forwards in X-Real-IP is used instead.
+    """
+    host = request.client.host if request.client else "anonymous"
+    forwarded = request.headers.get("x-real-ip")
+    if forwarded:
+        try:
+            peer = ipaddress.ip_address(host)
+        except ValueError:
+            return host
+        if any(peer in net for net in _trusted_proxies()):
+            return forwarded.strip()
+    return host
+
+
+def _submit(request: Request, kind: str, fn: TaskFn, priority: str, size: int = 0) -> TaskAccepted:
+    try:
+        task = get_task_queue().submit(kind, fn, client_id=_client_id(request), priority=priority, size=size)
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail=str(ex))
+    except ClientLimitError as ex:
+        raise HTTPException(status_code=429, detail=str(ex), headers={"Retry-After": "5"})
+    except QueueFullError as ex:
+        raise HTTPException(status_code=503, detail=str(ex), headers={"Retry-After": "10"})
+    return TaskAccepted(
+        task_id=task.id,
+        status=task.status,
+        status_url=f"/api/tasks/{task.id}",
+        events_url=f"/api/tasks/{task.id}/events",
+    )
+
+
+@router.post("/upload_and_analyze", status_code=202)
+async def submit_upload_and_analyze(
+    request: Request,
+    file: UploadFile = File(...),
+    category: str = Form(...),
+    selected_role: Optional[str] = Form(None),
+    job_description: Optional[str] = Form(None),
+    previous_resume_id: Optional[str] = Form(None),
+    priority: str = Form("normal"),
+) -> TaskAccepted:
+    # The upload must be read while the request is alive; the task owns the bytes afterwards
+    # Never read more than the cap (+1 byte to detect oversize) into memory
+    content = await file.read(pipeline.max_upload_bytes() + 1)
+    if not content:
+        raise HTTPException(status_code=400, detail="Empty file uploaded")
+    if len(content) > pipeline.max_upload_bytes():
+        raise HTTPException(status_code=413, detail=f"File exceeds the {pipeline.max_upload_bytes()} byte upload limit")
+    filename = file.filename or "uploaded"
+
+    def run(progress):
+        return pipeline.analyze_upload(
+            content,
+            filename=filename,
+            category=category,
+            job_description=job_description,
+            on_progress=progress,
+            previous_resume_id=previous_resume_id,
+        )
+
+    return _submit(request, "upload_and_analyze", run, priority, size=len(content))
+
+
+@router.post("/detailed_analysis", status_code=202)
+async def submit_detailed_analysis(request: Request, payload: TaskDetailedAnalysisRequest) -> TaskAccepted:
+    def run(progress):
+        return pipeline.analyze_detailed(payload.resume_id, payload.choice, on_progress=progress)
+
+    return _submit(request, "detailed_analysis", run, payload.priority)
+
+
+@router.get("/{task_id}")
+async def get_task(task_id: str) -> TaskStatusResponse:
+    snap = get_task_queue().snapshot(task_id)
+    if snap is None:
+        raise HTTPException(status_code=404, detail="task_id not found")
+    return TaskStatusResponse(**snap)
+
+
+@router.get("/{task_id}/events")
+async def task_events(task_id: str) -> StreamingResponse:
+    queue = get_task_queue()
+    if queue.snapshot(task_id) is None:
+        raise HTTPException(status_code=404, detail="task_id not found")
+
+    async def stream():
+        last_version = -1
+        while True:
+            snap = queue.snapshot(task_id)
+            if snap is None:
+                break
+            if snap["version"] != last_version:
+                last_version = snap["version"]
+                yield f"event: {snap['status']}\ndata: {orjson.dumps(snap).decode()}\n\n"
+                if snap["status"] in ("succeeded", "failed"):
+                    break
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
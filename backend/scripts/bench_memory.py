@@ -0,0 +1,109 @@
+"""Peak memory of the upload pipeline, per request.
+
+    python backend/scripts/bench_memory.py [--file resume.pdf] [--size-kb 4096]
+        [--requests 20] [--max-rss-mb 64] [--max-alloc-mb 32]
+
+Warms up on a small document (model, role vectors, skill matrix, keyword
+index), then runs pipeline.analyze_upload `--requests` times on slightly
+different copies of the full document. Reports the peak Python/numpy
+allocation of each request (tracemalloc) and how far the process peak RSS
+rose above the warm-up, and exits non-zero when either exceeds its budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+
+_SECTION = """Experience
+Senior Backend Engineer. Built REST and gRPC services in python, go and java on aws.
+Ran kubernetes and docker based deployments with terraform and github actions.
+Owned postgresql and redis data stores and kafka pipelines; cut p99 latency by 40%.
+Projects
+Realtime chat platform with react, node and websockets serving 50k daily users.
+Skills
+python, java, go, sql, docker, kubernetes, aws, terraform, react, git
+"""
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _document(path: str | None, size_kb: int) -> tuple[bytes, str]:
+    if path:
+        with open(path, "rb") as f:
+            return f.read(), os.path.basename(path)
+    # Synthetic oversized plain-text resume (e.g. OCR output of a long scan)
+    header = "Jane Doe\njane@example.com\nSummary\nBackend engineer.\n"
+    body = _SECTION * (size_kb * 1024 // len(_SECTION) + 1)
+    return (header + body).encode("utf-8")[: size_kb * 1024], "resume.txt"
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--file", help="resume to upload (PDF/DOCX/TXT); a synthetic text resume by default")
+    ap.add_argument("--size-kb", type=int, default=4096, help="size of the synthetic resume")
+    ap.add_argument("--requests", type=int, default=20)
+    ap.add_argument("--category", help="role category (defaults to the first one in the catalog)")
+    ap.add_argument("--job-description", default="Backend engineer with python, kubernetes and aws")
+    ap.add_argument("--max-rss-mb", type=float, default=64.0, help="budget for peak RSS growth after warm-up")
+    ap.add_argument("--max-alloc-mb", type=float, default=32.0, help="budget for peak traced allocation per request")
+    args = ap.parse_args()
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    sys.path.insert(0, root)
+    from backend.core import pipeline
+    from backend.core.embeddings import load_roles_data
+
+    content, filename = _document(args.file, args.size_kb)
+    category = args.category or next(iter(load_roles_data()), "")
+
+    # Warm up on a small slice so the document's own peak shows up in the RSS growth
+    pipeline.analyze_upload(content[:2048], filename, category, job_description=args.job_description)
+    gc.collect()
+    baseline = _peak_rss_mb()
+    print(f"Document: {filename}, {len(content) / 1024:.0f} KiB; peak RSS after warm-up {baseline:.1f} MiB")
+
+    tracemalloc.start()
+    peaks = []
+    started = time.perf_counter()
+    for i in range(args.requests):
+        # A different tail per request so every upload is parsed, embedded and cached afresh
+        doc = content + f"\nReference {i}\n".encode("utf-8")
+        tracemalloc.reset_peak()
+        # The upload itself is held by the web server anyway; count only what the pipeline adds
+        held = tracemalloc.get_traced_memory()[0]
+        pipeline.analyze_upload(doc, filename, category, job_description=args.job_description)
+        peaks.append((tracemalloc.get_traced_memory()[1] - held) / (1024 * 1024))
+        del doc
+        gc.collect()
+    elapsed = time.perf_counter() - started
+    tracemalloc.stop()
+
+    growth = _peak_rss_mb() - baseline
+    worst = max(peaks) if peaks else 0.0
+    print(f"{args.requests} requests in {elapsed:.1f}s")
+    print(f"Peak traced allocation per request: max {worst:.1f} MiB, mean {sum(peaks) / max(1, len(peaks)):.1f} MiB (budget {args.max_alloc_mb:.0f})")
+    print(f"Peak RSS growth over the run: {growth:.1f} MiB (budget {args.max_rss_mb:.0f})")
+
+    failed = False
+    if worst > args.max_alloc_mb:
+        print(f"FAIL: a request allocated {worst:.1f} MiB at peak")
+        failed = True
+    if growth > args.max_rss_mb:
+        print(f"FAIL: peak RSS grew by {growth:.1f} MiB")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
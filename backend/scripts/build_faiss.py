@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import sys
 import json
 import numpy as np
 
@@ -43,12 +44,25 @@ def main():
 
     idx_path = os.path.join(out_dir, "role_index.faiss")
     keys_path = os.path.join(out_dir, "role_keys.json")
+    vectors_path = os.path.join(out_dir, "role_vectors.npy")
 
     faiss.write_index(index, idx_path)
+    # Seed rows the catalog reuses instead of re-encoding; the API maps the versioned copies
+    tmp_vectors = vectors_path + ".tmp.npy"
+    np.save(tmp_vectors, np.ascontiguousarray(vecs))
+    os.replace(tmp_vectors, vectors_path)
     with open(keys_path, "w", encoding="utf-8") as f:
         json.dump(role_keys, f, ensure_ascii=False, indent=2)
 
-    print(f"Wrote {idx_path} and {keys_path} ({len(role_keys)} roles)")
+    print(f"Wrote {idx_path}, {vectors_path} and {keys_path} ({len(role_keys)} roles)")
+
+    # Commit the same vectors as a new catalog version so running workers pick
+    # them up without a restart; existing roles keep their stable ids.
+    sys.path.insert(0, root)
+    from backend.core.catalog import replace_all
+
+    catalog = replace_all(jobs, role_keys, vecs)
+    print(f"Committed catalog version {catalog.version}")
 
 
 if __name__ == "__main__":
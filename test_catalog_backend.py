@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+"""
+Role catalog persistence: the manifest in vector_store/ is the only source of
+truth once it exists, and transient embed saturation never disables vectors.
+
+Run with `python -m pytest test_catalog_backend.py` (no model download needed:
+a small hashing encoder stands in for Sentence-BERT).
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from backend.core import catalog, embeddings  # noqa: E402
+from backend.core.admission import StageSaturatedError  # noqa: E402
+
+
+ROLES = {
+    "Engineering": {
+        "Backend Developer": {"description": "APIs and databases", "skills": ["python", "sql"]},
+        "Frontend Developer": {"description": "Web interfaces", "skills": ["react"]},
+    },
+}
+
+
+class HashingEncoder:
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=False, **kwargs):
+        self.encoded += len(texts)
+        out = np.zeros((len(texts), 384), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                out[i, int(hashlib.md5(word.encode()).hexdigest(), 16) % 384] += 1.0
+        return out
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    jobs = tmp_path / "jobs.json"
+    jobs.write_text(json.dumps(ROLES, indent=2), encoding="utf-8")
+    store_dir = tmp_path / "vector_store"
+    monkeypatch.setattr(catalog, "_JOBS_PATH", str(jobs))
+    monkeypatch.setattr(catalog, "_STORE_DIR", str(store_dir))
+    monkeypatch.setattr(catalog, "_MANIFEST_PATH", str(store_dir / "catalog.json"))
+    monkeypatch.setattr(catalog, "_LOCK_PATH", str(store_dir / ".catalog.lock"))
+    monkeypatch.setattr(catalog, "_LEGACY_KEYS_PATH", str(store_dir / "role_keys.json"))
+    monkeypatch.setattr(catalog, "_LEGACY_VECTORS_PATH", str(store_dir / "role_vectors.npy"))
+    monkeypatch.setattr(catalog, "_catalog", None)
+    monkeypatch.setattr(catalog, "_catalog_stamp", None)
+    monkeypatch.setattr(catalog, "_vectors_failed", False)
+    encoder = HashingEncoder()
+    monkeypatch.setattr(embeddings, "_model", encoder)
+    return jobs, encoder
+
+
+def _restart():
+    # A fresh worker process starts without any cached catalog
+    catalog._catalog = None
+    catalog._catalog_stamp = None
+
+
+def test_runtime_edit_survives_restart_with_original_jobs_file(store):
+    jobs, _ = store
+    original = jobs.read_bytes()
+    catalog.upsert_role("Engineering", "Data Engineer", {"description": "Pipelines", "skills": ["spark"]})
+    assert jobs.read_bytes() == original
+
+    # The image ships the original jobs.json again; only vector_store/ is a volume
+    jobs.write_bytes(original)
+    _restart()
+    assert "Data Engineer" in catalog.current_roles()["Engineering"]
+
+
+def test_hand_edit_is_not_overwritten_by_admin_edit_or_compaction(store):
+    jobs, _ = store
+    catalog.ensure_vectors()
+    edited = json.loads(jobs.read_text(encoding="utf-8"))
+    edited["Engineering"]["Backend Developer"]["description"] = "Hand edited"
+    jobs.write_text(json.dumps(edited, indent=2), encoding="utf-8")
+    hand_edit = jobs.read_bytes()
+
+    catalog.upsert_role("Engineering", "Data Engineer", {"description": "Pipelines", "skills": []})
+    catalog.remove_role("Engineering", "Data Engineer")
+    catalog.compact()
+    assert jobs.read_bytes() == hand_edit
+
+    # Applying the hand edit is explicit
+    cat = catalog.import_jobs_file()
+    assert cat.roles["Engineering"]["Backend Developer"]["description"] == "Hand edited"
+    assert "Data Engineer" not in cat.roles["Engineering"]
+
+
+def test_edit_encodes_only_the_changed_role_and_keeps_ids(store):
+    _, encoder = store
+    first = catalog.ensure_vectors()
+    role_id = first.ids["Engineering::Backend Developer"]
+    before = encoder.encoded
+    cat = catalog.upsert_role("Engineering", "Backend Developer", {"description": "APIs, queues", "skills": []})
+    assert encoder.encoded - before == 1
+    assert cat.ids["Engineering::Backend Developer"] == role_id
+    assert cat.dead_rows == 1
+
+
+def test_saturated_embed_stage_does_not_disable_vectors(store, monkeypatch):
+    real = catalog._embed_roles
+
+    def saturated(texts):
+        raise StageSaturatedError("embed", 1)
+
+    monkeypatch.setattr(catalog, "_embed_roles", saturated)
+    with pytest.raises(StageSaturatedError):
+        catalog.ensure_vectors()
+    assert not catalog._vectors_failed
+
+    monkeypatch.setattr(catalog, "_embed_roles", real)
+    assert catalog.ensure_vectors().has_vectors
+
+
+def test_compare_scores_roles_against_catalog_rows(store, tmp_path, monkeypatch):
+    from backend.core import scoring, skills
+
+    _, encoder = store
+    monkeypatch.setattr(skills, "_MATRIX_PATH", str(tmp_path / "skill_matrix.npy"))
+    monkeypatch.setattr(skills, "_TERMS_PATH", str(tmp_path / "skill_terms.json"))
+    monkeypatch.setattr(skills, "_ontology", None)
+    monkeypatch.setattr(skills, "_ontology_stamp", None)
+    skills.get_ontology()
+    cat = catalog.ensure_vectors()
+    resume = embeddings.normalize_rows(embeddings.embed_texts(["python sql apis"])[0])
+    key = "Engineering::Backend Developer"
+    before = encoder.encoded
+    rows, unknown = scoring.compare_targets(resume, "", [], [key], [])
+    assert not unknown and encoder.encoded == before
+    expected = float(cat.matrix[cat.row_of_id[cat.ids[key]]] @ resume)
+    assert rows[0]["dense_score"] == round(expected * 100.0, 1)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+"""
+Resume cache: ids follow the uploaded bytes, so a revision never overwrites
+an earlier one, and the cache is bounded by bytes rather than entry count.
+
+Run with `python -m pytest test_resume_cache_backend.py`.
+"""
+
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from backend.core import embeddings  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    monkeypatch.setattr(embeddings, "_CACHE", {})
+    monkeypatch.setattr(embeddings, "_CACHE_SIZES", {})
+    monkeypatch.setattr(embeddings, "_cache_bytes", 0)
+
+
+def _cache(text):
+    sha = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    vec = np.ones(384, dtype=np.float32)
+    return embeddings.cache_resume_vector(vec, embeddings.resume_preview(text), text=text, content_sha=sha)
+
+
+def test_revision_changing_only_late_content_gets_its_own_id():
+    head = " ".join(f"word{i}" for i in range(400))
+    first = _cache(head + " python")
+    second = _cache(head + " java")
+    assert first != second
+    assert embeddings.load_cached_resume(first)["text"].endswith("python")
+    assert embeddings.load_cached_resume(second)["text"].endswith("java")
+
+
+def test_id_is_stable_for_the_same_content():
+    assert _cache("Experience\nBackend engineer") == _cache("Experience\nBackend engineer")
+
+
+def test_cache_evicts_oldest_once_over_its_byte_budget(monkeypatch):
+    monkeypatch.setattr(embeddings, "_CACHE_MAX_BYTES", 40_000)
+    ids = [_cache(f"resume {i} " + "x" * 10_000) for i in range(6)]
+    assert embeddings._cache_bytes <= 40_000
+    assert embeddings.load_cached_resume(ids[0]) is None
+    assert embeddings.load_cached_resume(ids[-1]) is not None
+    assert embeddings._cache_bytes == sum(embeddings._CACHE_SIZES.values())
+
+
+def test_recaching_an_id_does_not_double_count():
+    first = _cache("Experience\nBackend engineer")
+    size = embeddings._cache_bytes
+    assert _cache("Experience\nBackend engineer") == first
+    assert embeddings._cache_bytes == size
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+"""
+Resume segmentation: "Label: value" lines stay inside their section, and skills
+are read from every non-contact section whatever its embedding weight.
+
+Run with `python -m pytest test_sections_backend.py` (no model download needed:
+a small hashing encoder stands in for Sentence-BERT).
+"""
+
+import hashlib
+import os
+import re
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from backend.core import embeddings, pipeline, sections, skills  # noqa: E402
+
+
+class HashingEncoder:
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=False, **kwargs):
+        out = np.zeros((len(texts), 384), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                out[i, int(hashlib.md5(word.encode()).hexdigest(), 16) % 384] += 1.0
+        return out
+
+
+@pytest.fixture(autouse=True)
+def ontology(tmp_path, monkeypatch):
+    monkeypatch.setattr(embeddings, "_model", HashingEncoder())
+    monkeypatch.setattr(skills, "_MATRIX_PATH", str(tmp_path / "skill_matrix.npy"))
+    monkeypatch.setattr(skills, "_TERMS_PATH", str(tmp_path / "skill_terms.json"))
+    monkeypatch.setattr(skills, "_ontology", None)
+    monkeypatch.setattr(skills, "_ontology_stamp", None)
+    monkeypatch.setattr(skills, "_retry_at", None)
+
+
+RESUME = """Jane Doe
+jane@example.com
+Experience
+Backend Engineer at Acme, 2019 - 2024
+Courses: Machine Learning (Coursera)
+Technical Skills
+Languages: Python, Java, SQL
+Frameworks: React, Spring Boot
+Tools: Docker, Kubernetes
+"""
+
+
+def _labels(text):
+    return [s.label for s in sections.segment_resume(text)]
+
+
+def test_label_value_lines_stay_in_their_section():
+    segmented = sections.segment_resume(RESUME)
+    assert [s.label for s in segmented] == ["contact", "experience", "skills"]
+    assert "Courses: Machine Learning" in segmented[1].text
+    assert "Tools: Docker, Kubernetes" in segmented[2].text
+
+
+def test_skills_are_found_in_label_value_lines():
+    texts = sections.skill_texts(sections.segment_resume(RESUME))
+    found, _ = pipeline._section_skills(texts, RESUME.lower(), {})
+    for skill in ("python", "java", "sql", "react", "spring boot", "docker", "kubernetes", "machine learning"):
+        assert skill in found
+
+
+def test_bare_heading_still_starts_a_section():
+    assert _labels("Skills\nPython\nLanguages\nEnglish, French\n") == ["skills", "languages"]
+    assert _labels("Skills:\nPython\n") == ["skills"]
+
+
+def test_unweighted_sections_are_scanned_for_skills():
+    text = "Experience\nBuilt services\nInterests\nHobby robotics in python\n"
+    texts = sections.skill_texts(sections.segment_resume(text))
+    found, _ = pipeline._section_skills(texts, text.lower(), {})
+    assert "python" in found
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
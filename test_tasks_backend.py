@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+"""
+Task queue: queued uploads are bounded by bytes, task state is visible to
+every worker process through the shared sqlite store, and a saturated stage
+delays a task instead of failing it.
+
+Run with `python -m pytest test_tasks_backend.py`.
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from backend.core.admission import StageSaturatedError, admit, get_stage  # noqa: E402
+from backend.core.tasks import QueueFullError, TaskQueue, TaskStore  # noqa: E402
+
+
+def _wait(queue, task_id, status):
+    for _ in range(200):
+        snap = queue.snapshot(task_id)
+        if snap and snap["status"] == status:
+            return snap
+        threading.Event().wait(0.01)
+    raise AssertionError(f"task {task_id} never reached {status}")
+
+
+def test_queue_refuses_uploads_beyond_its_byte_budget():
+    gate = threading.Event()
+    queue = TaskQueue(workers=1, client_concurrency=1, max_queued_bytes=25)
+    first = queue.submit("upload", lambda progress: gate.wait(5), client_id="a", size=10)
+    queue.submit("upload", lambda progress: None, client_id="b", size=10)
+    with pytest.raises(QueueFullError):
+        queue.submit("upload", lambda progress: None, client_id="c", size=10)
+    gate.set()
+    _wait(queue, first.id, "succeeded")
+    # Finished tasks release their bytes
+    for _ in range(200):
+        if queue._held_bytes == 0:
+            break
+        threading.Event().wait(0.01)
+    queue.submit("upload", lambda progress: None, client_id="c", size=10)
+
+
+def test_other_worker_process_sees_task_through_store(tmp_path):
+    path = str(tmp_path / "tasks.sqlite3")
+    owner = TaskQueue(workers=1, store=TaskStore(path, 3600))
+    other = TaskQueue(workers=1, store=TaskStore(path, 3600))
+
+    def run(progress):
+        progress("embed", {"extracted_skills": ["python"]})
+        return {"ats_score": 0.5}
+
+    task = owner.submit("upload", run, client_id="a")
+    _wait(owner, task.id, "succeeded")
+    snap = other.snapshot(task.id)
+    assert snap["status"] == "succeeded"
+    assert snap["result"] == {"ats_score": 0.5}
+    assert snap["partial"] == {"extracted_skills": ["python"]}
+    assert other.snapshot("t_missing") is None
+
+
+def test_task_waits_for_a_saturated_stage():
+    stage = get_stage("test_saturated")
+    stage.concurrency, stage.queue_depth, stage.wait_seconds = 1, 0, 0.05
+    stage.acquire()
+    try:
+        # A request thread is turned away at once
+        with pytest.raises(StageSaturatedError):
+            with admit("test_saturated"):
+                pass
+
+        def run(progress):
+            with admit("test_saturated"):
+                return "done"
+
+        queue = TaskQueue(workers=1)
+        task = queue.submit("embed", run, client_id="a")
+        threading.Event().wait(0.2)
+        assert queue.snapshot(task.id)["status"] == "running"
+    finally:
+        stage.release()
+    assert _wait(queue, task.id, "succeeded")["result"] == "done"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))